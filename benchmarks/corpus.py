@@ -0,0 +1,131 @@
+"""
+corpus.py
+===
+Generate realistic synthetic .wkt logs for benchmarks.
+
+Sessions follow a 5/3/1-style weekly cycle over years of training. They mix
+the legacy notation (``Squat: 60 x 5, 80 x 3, 100 x 5``) with version 2
+ordered sets (``  1-3) [90] 100 x 5``), and include supersets, whose
+exercises interleave their set order, as in the examples in
+:mod:`crank.wkt`. Output is deterministic for a given seed.
+
+Run from the repository root::
+
+    python -m benchmarks.corpus [out.wkt] [years]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from crank.util.time import DATETIME_FORMAT
+
+MAIN_LIFTS = ('Squat', 'Deadlift', 'Bench press', 'Press')
+ASSISTANCE = ('Pull-ups', 'Push-ups', 'Swings, KB', 'Rows, DB', 'Curl, ring',
+              'Ab-rollouts', 'Dips', 'Front lever')
+COMMENTS = ('Felt strong', 'Tired from work', 'Low back tight',
+            'Good bar speed', 'Short on time')
+WEEKS = ((0.65, 0.75, 0.85), (0.70, 0.80, 0.90), (0.75, 0.85, 0.95))
+REPS = ((5, 5, 5), (3, 3, 3), (5, 3, 1))
+
+
+def generate(years=3, sessions_per_week=3, seed=0, v2_ratio=0.5,
+             superset_ratio=0.3, start=datetime(2014, 1, 6, 17, 30)):
+    """Return a synthetic .wkt log as a string, newest session first."""
+    rng = random.Random(seed)
+    maxes = {lift: rng.randrange(50, 120, 5) for lift in MAIN_LIFTS}
+    blocks = []
+    day = start
+    for week in range(years * 52):
+        cycle_week = week % 3
+        for session in range(sessions_per_week):
+            lift = MAIN_LIFTS[(week * sessions_per_week + session) %
+                              len(MAIN_LIFTS)]
+            when = day + timedelta(days=2 * session,
+                                   minutes=rng.randrange(-90, 90))
+            v2 = rng.random() < v2_ratio
+            blocks.append(session_block(rng, when, lift, maxes[lift],
+                                        cycle_week, v2,
+                                        rng.random() < superset_ratio))
+        day += timedelta(weeks=1)
+        if cycle_week == 2:  # New cycle; training maxes go up, or stall
+            for lift in maxes:
+                maxes[lift] += rng.choice((0, 0, 2, 5))
+    return '\n\n'.join(reversed(blocks)) + '\n'
+
+
+def session_block(rng, when, lift, training_max, cycle_week, v2, superset):
+    lines = [when.strftime(DATETIME_FORMAT)]
+    lines.append('- week: {:d}'.format(cycle_week + 1))
+    if v2:
+        lines.append('- version: 2')
+    if rng.random() < 0.2:
+        lines.append('- ' + rng.choice(COMMENTS))
+    weights = [round(training_max * p) for p in WEEKS[cycle_week]]
+    reps = REPS[cycle_week]
+    warmups = [round(training_max * p) for p in (0.4, 0.5, 0.6)]
+    lines.append(lift + ':' + ('' if v2 else ' ' + legacy_sets(
+        warmups, weights, reps)))
+    lines.append('- Training max: {:d} kgs'.format(training_max))
+    lines.append('- unit: kgs')
+    if v2:
+        order = 1
+        for w in warmups:
+            lines.append('  {:d}) {:d} x 5'.format(order, w))
+            order += 1
+        for w, r in zip(weights, reps):
+            lines.append('  {:d}) [{:d}] {:d} x {:d}'.format(
+                order, rng.randrange(90, 240, 30), w, r))
+            order += 1
+    extras = rng.sample(ASSISTANCE, 2)
+    if superset:
+        lines.extend(superset_lines(rng, extras, v2))
+    else:
+        for name in extras:
+            lines.extend(assistance_lines(rng, name, v2))
+    return '\n'.join(lines)
+
+
+def legacy_sets(warmups, weights, reps):
+    """Legacy shorthand, e.g. '40, 50, 60 x 5, 65 x 5, 75 x 5, 85 x 5'."""
+    return '{} x 5, {}'.format(
+        ', '.join(str(w) for w in warmups),
+        ', '.join('{:d} x {:d}'.format(w, r) for w, r in zip(weights, reps)))
+
+
+def assistance_lines(rng, name, v2):
+    sets = [rng.randrange(5, 20) for _ in range(rng.randrange(3, 6))]
+    if not v2:
+        return [name + ': ' + ', '.join(str(r) for r in sets)]
+    lines = [name + ':', '- unit: reps']
+    for i, r in enumerate(sets, 1):
+        lines.append('  {:d}) [60] {:d}'.format(i, r))
+    return lines
+
+
+def superset_lines(rng, names, v2):
+    """Two exercises done back to back: orders 1,3,5) and 2,4,6)."""
+    n = rng.randrange(3, 5)
+    lines = []
+    for offset, name in enumerate(names):
+        reps = rng.randrange(5, 15)
+        if not v2:
+            lines.append('{}: {} ({:d})'.format(name, reps, n))
+            continue
+        orders = ','.join(str(offset + 1 + 2 * i) for i in range(n))
+        lines.append(name + ':')
+        lines.append('- superset')
+        lines.append('  {}) {:d}'.format(orders, reps))
+    return lines
+
+
+def main(out=None, years=3):
+    wkt = generate(int(years))
+    if out is None:
+        sys.stdout.write(wkt)
+    else:
+        with open(out, 'w') as fp:
+            fp.write(wkt)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
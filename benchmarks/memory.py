@@ -0,0 +1,73 @@
+"""
+memory.py
+===
+Per-workout memory footprint of parsed and loaded Workouts.
+
+A synthetic corpus (see :mod:`benchmarks.corpus`) is parsed, then saved and
+loaded back in each storage format, and the memory still held afterwards,
+as counted by tracemalloc, is divided by the number of Workouts. Run from
+the repository root::
+
+    python -m benchmarks.memory [years]
+"""
+import gc
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.corpus import generate
+from crank.core.workouts import Workouts
+from crank.util.logging import set_stdout_level
+
+
+def footprint(func):
+    """Return ``(result, bytes held by the result, allocated blocks)``."""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),)).statistics('lineno')
+    return (result, sum(s.size for s in stats),
+            sum(s.count for s in stats))
+
+
+def materialize(wkts):
+    """Touch every Exercise, so lazy Workouts are measured in full."""
+    for w in wkts:
+        for ex in w.exercises:
+            pass
+    return wkts
+
+
+def main(years=3):
+    set_stdout_level(logging.ERROR)
+    wkt = generate(int(years))
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [('parse', lambda: Workouts.parse_wkt(wkt))]
+        for fmt in (Workouts.JSON, Workouts.BINARY):
+            wkts = Workouts.parse_wkt(wkt)
+            wkts.filename = os.path.join(tmp, 'workouts.' + fmt)
+            wkts.save(fmt)
+            cases.append(('load ' + fmt,
+                          lambda f=wkts.filename: Workouts.load(f)))
+        cases.append(('load json, lazy', lambda: Workouts.load(
+            os.path.join(tmp, 'workouts.json'), lazy=True)))
+        cases.append(('lazy, then used', lambda: materialize(
+            Workouts.load(os.path.join(tmp, 'workouts.json'), lazy=True))))
+        print('{:18} {:>10} {:>14} {:>14}'.format(
+            'case', 'workouts', 'bytes/workout', 'blocks/workout'))
+        for name, func in cases:
+            wkts, size, count = footprint(func)
+            n = wkts.length
+            print('{:18} {:>10,d} {:>14,.0f} {:>14,.1f}'.format(
+                name, n, size / n, count / n))
+            del wkts
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,128 @@
+"""
+set_parse.py
+===
+Throughput of :meth:`crank.core.set.Set.parse` against the previous
+three-stage (ordering regex, ``str.split``, ``finditer``) implementation.
+
+Run from the repository root::
+
+    python -m benchmarks.set_parse
+"""
+import copy
+import itertools
+import re
+import timeit
+
+from crank.core.set import Set, SET_RE
+
+
+SET_LINES = [
+    '  1) 8',
+    '  1) 114 x 8',
+    '1) [30] 114 x 8',
+    '1,2) [30] 114 x 8',
+    '  4-6) [30] 114 x 8',
+    '2,3) 100 x 8, [60] 110 x 7',
+    '1-3, 5-7) 100 x 8, [60] 110 x 7',
+    '1-3) 100x8, 110x7, 120x 6',
+    '1 , 3) 8',
+    '1,3-5, 7)8',
+    '  1,4,7) 19',
+    '1-50) [30] 100 x 5',
+]
+
+LEGACY_ORDERING_RE = re.compile(r'''
+    \s*
+    (?P<order>[\d\s,-]+)\)
+    \s*
+    ''', re.X)
+
+
+def legacy_parse(string):
+    """The Set.parse implementation this benchmark is measured against.
+
+    Kept as it was, as crank/core/tests/test_set.py checks the lexer against
+    it too.
+    """
+    order_groups, set_str = legacy_parse_ordering(string)
+    sets = legacy_parse_set_body(set_str)
+    final = []
+    if len(sets) == 1 and len(order_groups) >= 1:
+        base = sets[0]
+        for o in itertools.chain(*order_groups):
+            s = copy.copy(base)
+            s.order = o
+            final.append(s)
+    elif len(order_groups) == len(sets):
+        for i, og in enumerate(order_groups):
+            for o in og:
+                s = copy.copy(sets[i])
+                s.order = o
+                final.append(s)
+    elif (len(order_groups) == 1 and
+          len(order_groups[0]) == len(sets)):
+        for i, o in enumerate(order_groups[0]):
+            sets[i].order = o
+            final.append(sets[i])
+    else:
+        raise ValueError("Set notation mismatch")
+    return final
+
+
+def legacy_parse_ordering(string):
+    m = LEGACY_ORDERING_RE.match(string)
+    if not m:
+        raise ValueError(string + " isn't a recognized set string")
+    parts = m.groupdict()['order'].strip(', ')
+    ordering = []
+    for s in parts.split(','):
+        val = s.strip()
+        try:
+            ordering.append((int(val),))
+        except ValueError:
+            n = re.match(r'(\d+)-(\d+)', val)
+            if not n:
+                raise
+            ordering.append(tuple(range(int(n.groups()[0]),
+                                        int(n.groups()[1])+1)))
+    return ordering, m.string[m.end():]
+
+
+def legacy_parse_set_body(string):
+    sets = []
+    for m in SET_RE.finditer(string):
+        gd = m.groupdict()
+        vals = {}
+        for attr in ['work', 'reps', 'rest']:
+            v = gd.get(attr)
+            if v:
+                vals[attr] = int(v)
+        sets.append(Set(**vals))
+    return sets
+
+
+def check_equivalence(lines):
+    for line in lines:
+        assert Set.parse(line) == legacy_parse(line), line
+
+
+def bench(func, lines, number=2000):
+    """Return parsed lines per second."""
+    def run():
+        for line in lines:
+            func(line)
+    secs = min(timeit.repeat(run, number=number, repeat=3))
+    return len(lines) * number / secs
+
+
+def main():
+    check_equivalence(SET_LINES)
+    legacy = bench(legacy_parse, SET_LINES)
+    current = bench(Set.parse, SET_LINES)
+    print('legacy  Set.parse: {:>10,.0f} lines/s'.format(legacy))
+    print('current Set.parse: {:>10,.0f} lines/s'.format(current))
+    print('speedup:           {:>10.2f}x'.format(current / legacy))
+
+
+if __name__ == '__main__':
+    main()
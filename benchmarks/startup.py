@@ -0,0 +1,64 @@
+"""
+startup.py
+===
+Import time of crank's entry points, from ``python -X importtime``.
+
+Each module is imported in a fresh interpreter; the cumulative time of the
+module itself is reported along with the slowest modules it pulled in, and
+anything over budget is flagged. Run from the repository root::
+
+    python -m benchmarks.startup [module ...]
+"""
+import subprocess
+import sys
+
+# Budget for each entry point, in milliseconds
+BUDGET_MS = 50
+MODULES = (
+    'crank.program.fto.cli',
+    'crank.core.workout',
+    'crank.core.workouts',
+)
+# Imports deferred until they're needed; these shouldn't show up at startup
+HEAVY = ('numpy', 'dateutil', 'colorama', 'blist', 'pprint', 'argparse',
+         'multiprocessing')
+
+
+def import_times(module, repeat=5):
+    """Return ``{name: cumulative microseconds}`` for importing a module.
+
+    The fastest of ``repeat`` runs is kept for each name, which discards
+    cold-cache noise.
+    """
+    best = {}
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            name = name.strip()
+            best[name] = min(int(cumulative), best.get(name, sys.maxsize))
+    return best
+
+
+def main(*modules):
+    over = []
+    for module in modules or MODULES:
+        times = import_times(module)
+        total = times[module] / 1000
+        heavy = sorted(name for name in times
+                       if name.split('.')[0] in HEAVY and '.' not in name)
+        flag = '' if total <= BUDGET_MS else '  OVER BUDGET'
+        print('{:28} {:>8.1f} ms{}'.format(module, total, flag))
+        if heavy:
+            print('    heavy imports: ' + ', '.join(heavy))
+        if total > BUDGET_MS:
+            over.append(module)
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,73 @@
+"""
+storage.py
+===
+File size, save time and load time of the JSON, binary and SQLite Workouts
+formats.
+
+Run from the repository root::
+
+    python -m benchmarks.storage [file.wkt]
+"""
+import logging
+import os
+import sys
+import tempfile
+import timeit
+
+from crank.core.sqlite import SQLiteWorkouts
+from crank.core.workouts import Workouts
+from crank.util.logging import set_stdout_level
+
+TEST_WKT_FILE = os.path.join(os.path.dirname(__file__), os.pardir, 'crank',
+                             'core', 'tests', 'fixtures', 'squat.wkt')
+
+
+def bench(wkts, fmt, number=20, lazy=False):
+    """Return (bytes, seconds per save, seconds per load) for a format."""
+    def save():
+        wkts.save(fmt=fmt)
+
+    def load():
+        Workouts.load(wkts.filename, lazy=lazy)
+
+    save_secs = min(timeit.repeat(save, number=number, repeat=3)) / number
+    size = os.path.getsize(wkts.filename)
+    load_secs = min(timeit.repeat(load, number=number, repeat=3)) / number
+    return size, save_secs, load_secs
+
+
+def main(wkt_file=TEST_WKT_FILE):
+    set_stdout_level(logging.ERROR)
+    wkts = Workouts.parse_wkt_file(wkt_file)
+    print('{:d} workouts from {}'.format(wkts.length, wkt_file))
+    print('{:8} {:>10} {:>10} {:>10}'.format('format', 'bytes', 'save ms',
+                                             'load ms'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in (Workouts.JSON, Workouts.BINARY):
+            wkts.filename = os.path.join(tmp, 'workouts.' + fmt)
+            size, save, load = bench(wkts, fmt)
+            print('{:8} {:>10,d} {:>10.2f} {:>10.2f}'.format(
+                fmt, size, save * 1000, load * 1000))
+        wkts.filename = os.path.join(tmp, 'workouts.json')
+        size, save, load = bench(wkts, Workouts.JSON, lazy=True)
+        print('{:8} {:>10,d} {:>10.2f} {:>10.2f}'.format(
+            'lazy', size, save * 1000, load * 1000))
+        wkts.json_indent = None
+        size, save, load = bench(wkts, Workouts.JSON)
+        wkts.json_indent = Workouts.json_indent
+        print('{:8} {:>10,d} {:>10.2f} {:>10.2f}'.format(
+            'compact', size, save * 1000, load * 1000))
+        db = SQLiteWorkouts.from_workouts(os.path.join(tmp, 'workouts.db'),
+                                          wkts)
+        # Only the first save writes anything, so it's timed once
+        save = timeit.timeit(db.save, number=1)
+        size = os.path.getsize(db.filename)
+        load = min(timeit.repeat(lambda: Workouts.load(db.filename).close(),
+                                 number=5, repeat=3)) / 5
+        db.close()
+        print('{:8} {:>10,d} {:>10.2f} {:>10.2f}'.format(
+            'sqlite', size, save * 1000, load * 1000))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,157 @@
+"""
+suite.py
+===
+Benchmark suite over a synthetic corpus, checked against stored baselines.
+
+Each benchmark reports microseconds per operation, the best of several
+runs. Results more than ``--tolerance`` slower than ``baselines.json`` are
+flagged, and the exit status is non-zero. Baselines are machine-specific:
+regenerate them with ``--save`` on the machine that runs the check.
+
+Run from the repository root::
+
+    python -m benchmarks.suite [--save] [--tolerance 0.25] [name ...]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import tempfile
+import timeit
+
+from benchmarks.corpus import generate
+from crank.core.exercise import Exercise
+from crank.core.set import Set
+from crank.core.tags import parse_tags
+from crank.core.workout import Workout
+from crank.core.workouts import Workouts
+from crank.program.fto.logic import build_sets
+from crank.program.fto.util import MassUnit
+from crank.program.ssp.crank import Accumulator, Aggregator
+from crank.util import stream
+from crank.util.logging import set_stdout_level
+
+BASELINES = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+
+def load_corpus(years=3):
+    """Split a synthetic corpus into the inputs each benchmark needs."""
+    blocks = list(stream.buffer_data(generate(years).split('\n')))
+    exercises, set_lines = [], []
+    for block in blocks:
+        _, lines = parse_tags(block[1:])
+        exercises.append(lines)
+        set_lines.extend(line for line in lines
+                         if ')' in line and ':' not in line)
+    return blocks, exercises, set_lines
+
+
+def benchmarks(tmp, years=3):
+    """Return ``{name: (callable, operations per call)}``.
+
+    Files are written under the directory ``tmp``.
+    """
+    blocks, exercises, set_lines = load_corpus(years)
+    wkts = Workouts.parse_wkt(generate(years))
+    wkts.filename = os.path.join(tmp, 'workouts.json')
+    wkts.save()
+    maxes = [(m, p) for m in range(60, 260, 5) for p in (0.85, 0.9, 0.95)]
+
+    def set_parse():
+        for line in set_lines:
+            Set.parse(line)
+
+    def exercise_parse():
+        for lines in exercises:
+            Exercise.parse_exercises(lines)
+
+    def workout_parse():
+        for block in blocks:
+            Workout.parse_wkt(block)
+
+    def fto_build_sets():
+        for m, p in maxes:
+            build_sets(m, p, MassUnit.kgs)
+
+    def ssp_accumulator():
+        acc = Accumulator(1, 10, 100, 'Pull-ups')
+        while acc.day <= acc.apex:
+            acc.crank()
+
+    def ssp_aggregator():
+        # Aggregator.crank prints every step
+        with contextlib.redirect_stdout(io.StringIO()):
+            Aggregator(190, 10, 100, 'Pull-ups')
+
+    return {
+        'set.parse': (set_parse, len(set_lines)),
+        'exercise.parse_exercises': (exercise_parse, len(exercises)),
+        'workout.parse_wkt': (workout_parse, len(blocks)),
+        'workouts.save': (wkts.save, wkts.length),
+        'workouts.load': (lambda: Workouts.load(wkts.filename), wkts.length),
+        'fto.build_sets': (fto_build_sets, len(maxes)),
+        'ssp.accumulator': (ssp_accumulator, 100),
+        'ssp.aggregator': (ssp_aggregator, 90),
+    }
+
+
+def run(names=None, repeat=5):
+    """Return ``{name: microseconds per operation}``.
+
+    Each benchmark is called enough times per run to take at least 0.2s.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (func, ops) in benchmarks(tmp).items():
+            if names and name not in names:
+                continue
+            timer = timeit.Timer(func)
+            number, _ = timer.autorange()
+            secs = min(timer.repeat(repeat=repeat, number=number))
+            results[name] = secs / number / ops * 1e6
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run benchmarks and compare them to baselines.')
+    parser.add_argument('names', nargs='*', help='Benchmarks to run')
+    parser.add_argument('--save', action='store_true',
+                        help='Store the results as the new baselines')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown before flagging, e.g. 0.25')
+    args = parser.parse_args(argv)
+    set_stdout_level(logging.ERROR)
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as fp:
+            baselines = json.load(fp)
+    results = run(args.names)
+    regressions = []
+    print('{:26} {:>12} {:>12} {:>8}'.format(
+        'benchmark', 'us/op', 'baseline', 'change'))
+    for name, us in results.items():
+        base = baselines.get(name)
+        if base is None:
+            print('{:26} {:>12.2f} {:>12} {:>8}'.format(name, us, '-', '-'))
+            continue
+        change = us / base - 1
+        flag = ''
+        if change > args.tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print('{:26} {:>12.2f} {:>12.2f} {:>+7.0%}{}'.format(
+            name, us, base, change, flag))
+    if args.save:
+        baselines.update(results)
+        with open(BASELINES, 'w') as fp:
+            json.dump(baselines, fp, indent=2, sort_keys=True)
+            fp.write('\n')
+    return 1 if regressions and not args.save else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
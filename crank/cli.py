@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+cli.py
+===
+The ``crank`` command.
+
+``crank profile FILE`` parses a .wkt file, or loads a saved Workouts file,
+and reports where the time and memory went::
+
+    crank profile workouts.wkt
+    crank profile workouts.json --top 30 --sort tottime
+"""
+import logging
+import sys
+import time
+
+from crank.core.workouts import Workouts
+from crank.util import trace
+from crank.util.logging import set_stdout_level
+
+PARSE, LOAD = 'parse', 'load'
+
+
+def profile_file(filename, mode=None, top=15, sort='cumulative', lazy=False,
+                 out=sys.stdout):
+    """Profile parsing or loading ``filename``, writing a report to ``out``.
+
+    ``mode`` is :data:`PARSE` or :data:`LOAD`; by default .wkt files are
+    parsed and anything else is loaded. The file is read twice: once under
+    cProfile with stage tracing on, and once under tracemalloc, whose
+    bookkeeping would otherwise skew the timings.
+    """
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+    if mode is None:
+        mode = PARSE if filename.endswith('.wkt') else LOAD
+    if mode == PARSE:
+        def func():
+            return Workouts.parse_wkt_file(filename)
+    else:
+        def func():
+            return Workouts.load(filename, lazy=lazy)
+
+    profiler = cProfile.Profile()
+    with trace.tracing() as tracer:
+        start = time.perf_counter()
+        profiler.enable()
+        wkts = func()
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+    del wkts
+
+    tracemalloc.start()
+    wkts = func()
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),))
+    sites = snapshot.statistics('lineno')
+
+    print('{} {}: {:,d} workouts in {:.1f} ms'.format(
+        mode, filename, wkts.length, elapsed * 1e3), file=out)
+    print('\n' + tracer.report(), file=out)
+    print('\nmemory: peak {:.2f} MiB, {:,d} blocks ({:.2f} MiB) held by '
+          'the result'.format(peak / 2**20, sum(s.count for s in sites),
+                              sum(s.size for s in sites) / 2**20), file=out)
+    print('{:>10} {:>10}  allocated at'.format('KiB', 'blocks'), file=out)
+    for stat in sites[:top]:
+        frame = stat.traceback[0]
+        print('{:>10.1f} {:>10,d}  {}:{}'.format(
+            stat.size / 1024, stat.count, frame.filename, frame.lineno),
+            file=out)
+    stats = io.StringIO()
+    pstats.Stats(profiler, stream=stats).sort_stats(sort).print_stats(top)
+    print('\n' + stats.getvalue().strip(), file=out)
+
+
+def parse_args(argv=None):
+    from argparse import ArgumentParser
+    parser = ArgumentParser(prog='crank')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    prof = commands.add_parser(
+        'profile', help='Profile parsing or loading a workouts file')
+    prof.add_argument('filename')
+    prof.add_argument('--mode', choices=(PARSE, LOAD),
+                      help='Default: parse .wkt files, load anything else')
+    prof.add_argument('--top', type=int, default=15,
+                      help='Number of functions and allocation sites shown')
+    prof.add_argument('--sort', default='cumulative',
+                      help='pstats sort key, e.g. cumulative or tottime')
+    prof.add_argument('--lazy', action='store_true',
+                      help='Load JSON lazily')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Per-block parse warnings would bury the report
+    set_stdout_level(logging.ERROR)
+    if args.command == 'profile':
+        profile_file(args.filename, args.mode, args.top, args.sort,
+                     args.lazy)
+
+
+if __name__ == '__main__':
+    main()
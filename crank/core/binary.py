@@ -0,0 +1,163 @@
+"""
+binary.py
+===
+Compact binary storage for Workouts.
+
+Layout::
+
+    MAGIC VERSION
+    <str filename>
+    (<u32 length> <workout>)*
+
+Each workout record is a timestamp, a tag map and its exercises; an
+exercise is a name, a tag map, its raw set string and its Sets as packed
+little-endian int32 ``work, reps, rest, order`` rows. Strings are UTF-8,
+prefixed by their u32 byte length.
+"""
+import json
+import struct
+from datetime import datetime
+from sys import intern
+
+from crank.core.exercise import Exercise
+from crank.core.set import SetArray
+from crank.core.tags import intern_tag, intern_tags
+from crank.core.workout import Workout
+
+MAGIC = b'CRNK'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sB')
+_U8 = struct.Struct('<B')
+_U32 = struct.Struct('<I')
+_DATETIME = struct.Struct('<HBBBBBI')
+
+# Timestamp kinds
+_TS_DATETIME, _TS_STR = 0, 1
+# Tag map kinds: all-string keys and values, or anything else as JSON
+_TAGS_STR, _TAGS_JSON = 0, 1
+
+
+def is_binary(prefix):
+    """Whether the leading bytes of a file are a binary Workouts header."""
+    return prefix[:len(MAGIC)] == MAGIC
+
+
+def dump(filename, workouts, fp):
+    """Write Workouts to a binary file object."""
+    fp.write(_HEADER.pack(MAGIC, VERSION))
+    fp.write(_pack_str(filename or ''))
+    for w in workouts:
+        record = _pack_workout(w)
+        fp.write(_U32.pack(len(record)))
+        fp.write(record)
+
+
+def load(fp):
+    """Read a binary file object into a JSON-like dict of Workouts.
+
+    Workouts are fully built; the dict mirrors ``Workouts.to_json`` so it can
+    be passed straight to the :class:`Workouts` constructor.
+    """
+    buf = memoryview(fp.read())
+    magic, version = _HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise ValueError('Not a binary Workouts file')
+    if version != VERSION:
+        raise ValueError('Unsupported binary Workouts version: %d' % version)
+    filename, pos = _unpack_str(buf, _HEADER.size)
+    workouts = []
+    while pos < len(buf):
+        length, = _U32.unpack_from(buf, pos)
+        pos += _U32.size
+        workouts.append(_unpack_workout(buf, pos))
+        pos += length
+    return {'filename': filename or None, 'workouts': workouts}
+
+
+def _pack_workout(w):
+    parts = []
+    ts = w.timestamp
+    if isinstance(ts, datetime) and ts.tzinfo is None:
+        parts.append(_U8.pack(_TS_DATETIME))
+        parts.append(_DATETIME.pack(ts.year, ts.month, ts.day, ts.hour,
+                                    ts.minute, ts.second, ts.microsecond))
+    else:  # Unparsed, or timezone-aware: store the string form
+        parts.append(_U8.pack(_TS_STR))
+        parts.append(_pack_str(ts.isoformat() if isinstance(ts, datetime)
+                               else str(ts)))
+    parts.append(_pack_tags(w.tags))
+    parts.append(_U32.pack(len(w.exercises)))
+    for ex in w.exercises:
+        parts.append(_pack_str(ex.name))
+        parts.append(_pack_tags(ex.tags))
+        parts.append(_pack_str(ex.raw_sets or ''))
+        data = ex.sets.data
+        parts.append(_U32.pack(len(data)))
+        parts.append(struct.pack('<%di' % len(data), *data))
+    return b''.join(parts)
+
+
+def _unpack_workout(buf, pos):
+    kind, = _U8.unpack_from(buf, pos)
+    pos += _U8.size
+    if kind == _TS_DATETIME:
+        timestamp = datetime(*_DATETIME.unpack_from(buf, pos))
+        pos += _DATETIME.size
+    else:
+        timestamp, pos = _unpack_str(buf, pos)
+    tags, pos = _unpack_tags(buf, pos)
+    n, = _U32.unpack_from(buf, pos)
+    pos += _U32.size
+    exercises = []
+    for _ in range(n):
+        name, pos = _unpack_str(buf, pos)
+        name = intern(name)
+        ex_tags, pos = _unpack_tags(buf, pos)
+        raw_sets, pos = _unpack_str(buf, pos)
+        size, = _U32.unpack_from(buf, pos)
+        pos += _U32.size
+        sets = SetArray()
+        sets.data.extend(struct.unpack_from('<%di' % size, buf, pos))
+        pos += 4 * size
+        exercises.append(Exercise(name, sets, raw_sets, ex_tags))
+    return Workout(timestamp, tags, exercises)
+
+
+def _pack_str(s):
+    b = s.encode()
+    return _U32.pack(len(b)) + b
+
+
+def _unpack_str(buf, pos):
+    n, = _U32.unpack_from(buf, pos)
+    start = pos + _U32.size
+    return str(buf[start:start+n], 'utf-8'), start + n
+
+
+def _pack_tags(tags):
+    if all(isinstance(k, str) and isinstance(v, str)
+           for k, v in tags.items()):
+        parts = [_U8.pack(_TAGS_STR), _U32.pack(len(tags))]
+        for k, v in tags.items():
+            parts.append(_pack_str(k))
+            parts.append(_pack_str(v))
+        return b''.join(parts)
+    return _U8.pack(_TAGS_JSON) + _pack_str(json.dumps(tags))
+
+
+def _unpack_tags(buf, pos):
+    kind, = _U8.unpack_from(buf, pos)
+    pos += _U8.size
+    if kind == _TAGS_JSON:
+        s, pos = _unpack_str(buf, pos)
+        return intern_tags(json.loads(s)), pos
+    n, = _U32.unpack_from(buf, pos)
+    pos += _U32.size
+    tags = {}
+    for _ in range(n):
+        k, pos = _unpack_str(buf, pos)
+        v, pos = _unpack_str(buf, pos)
+        k, v = intern_tag(k, v)
+        tags[k] = v
+    return tags, pos
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+
+from crank.core.workout import Workout
+from crank.util.logging import logger
+
+# Bump whenever parsing, or the Workout JSON, changes what's cached; caches
+# written by another version are discarded
+VERSION = 2
+HEADER = '# crank parse cache v{:d}\n'
+
+
+class ParseCache:
+    """On-disk cache of parsed .wkt blocks.
+
+    Maps a hash of each block's text to the JSON of the Workout parsed from
+    it, so re-importing a log only parses the blocks that are new or edited.
+    The file starts with a :data:`VERSION` header, then holds one ``<sha1>
+    <json>`` line per block; entries are kept as text until they're hit.
+    """
+
+    def __init__(self, filename, blocks=None):
+        self.filename = filename
+        self.blocks = blocks or {}
+        self.seen = set()
+        self.hits = self.misses = 0
+
+    @classmethod
+    def load(cls, filename):
+        """Load a cache file, or start an empty cache if there isn't one, or
+        it was written by another :data:`VERSION`."""
+        blocks = {}
+        if os.path.exists(filename):
+            with open(filename) as fp:
+                if fp.readline() != HEADER.format(VERSION):
+                    logger.info('Discarding outdated parse cache %s', filename)
+                    return cls(filename)
+                for line in fp:
+                    key, _, wkt_json = line.rstrip('\n').partition(' ')
+                    blocks[key] = wkt_json
+        return cls(filename, blocks)
+
+    def save(self, prune=True):
+        """Write the cache, dropping blocks unseen since it was loaded."""
+        logger.debug('saving %r', self)
+        keys = self.seen if prune else self.blocks.keys()
+        with open(self.filename, 'w') as fp:
+            fp.write(HEADER.format(VERSION))
+            for key in keys:
+                fp.write(key + ' ' + self.blocks[key] + '\n')
+
+    def parse(self, wkt_block):
+        """Parse a block of .wkt lines, using the cached Workout if present."""
+        key = block_hash(wkt_block)
+        self.seen.add(key)
+        wkt_json = self.blocks.get(key)
+        if wkt_json is not None:
+            self.hits += 1
+            return Workout.from_json(json.loads(wkt_json))
+        self.misses += 1
+        wkt = Workout.parse_wkt(wkt_block)
+        self.blocks[key] = json.dumps(wkt.to_json())
+        return wkt
+
+    def __repr__(self):
+        return 'ParseCache({!r}, hits={}, misses={})'.format(
+            self.filename, self.hits, self.misses)
+
+
+def block_hash(wkt_block):
+    """Hash the lines of a .wkt block."""
+    return hashlib.sha1('\n'.join(wkt_block).encode()).hexdigest()
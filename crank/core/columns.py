@@ -0,0 +1,137 @@
+"""
+columns.py
+===
+Flatten Workouts into NumPy columns for vectorized analytics.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+
+from crank.program.fto.util import MassUnit, kgs2lbs, lbs2kg
+
+
+COLUMNS = ('timestamp', 'exercise', 'work', 'reps', 'rest', 'order', 'unit')
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+# The epoch was a Thursday; shift by this much to start weeks on Monday
+MONDAY = 3 * DAY
+
+
+def mass_unit(tag):
+    """Map a ``unit`` tag, e.g. 'kg' or 'kgs x reps', to a MassUnit."""
+    if not tag:
+        return None
+    unit = tag.split()[0].lower()
+    if unit.startswith('kg'):
+        return MassUnit.kgs
+    if unit.startswith('lb'):
+        return MassUnit.lbs
+    return None
+
+
+def to_columns(workouts, unit=MassUnit.kgs):
+    """Flatten every Set of every Exercise of every Workout into columns.
+
+    Returns a dict of equal-length arrays, one row per Set, plus the list of
+    exercise ``names``:
+
+        * ``timestamp``: Workout time as seconds since the epoch, reading
+          naive (wall-clock) times as UTC so weeks split on calendar dates
+        * ``exercise``: Index into the ``names`` list
+        * ``work``, ``reps``, ``rest``, ``order``: The Set's values
+        * ``unit``: The ``unit`` tag of the Exercise (or its Workout)
+
+    Work is converted to ``unit`` wherever the ``unit`` tag names a unit of
+    mass; other units (e.g. seconds) are left as they are. Workouts without a
+    parsed timestamp are skipped.
+    """
+    names, name_ids = [], {}
+    ts, ex_ids, units, sets = [], [], [], []
+    for w in workouts:
+        if not isinstance(w.timestamp, datetime):
+            continue
+        epoch = _epoch(w.timestamp)
+        for ex in w.exercises:
+            if not len(ex.sets):
+                continue
+            if ex.name not in name_ids:
+                name_ids[ex.name] = len(names)
+                names.append(ex.name)
+            n = len(ex.sets)
+            ts.append(np.full(n, epoch))
+            ex_ids.append(np.full(n, name_ids[ex.name], dtype=np.int32))
+            units.extend([ex.tags.get('unit') or w.tags.get('unit', '')] * n)
+            sets.append(np.frombuffer(ex.sets.data, dtype=np.intc))
+
+    data = (np.concatenate(sets).reshape(-1, 4) if sets else
+            np.empty((0, 4), dtype=np.intc))
+    cols = {
+        'names': names,
+        'timestamp': np.concatenate(ts) if ts else np.empty(0),
+        'exercise': (np.concatenate(ex_ids) if ex_ids else
+                     np.empty(0, dtype=np.int32)),
+        'unit': np.array(units, dtype=object),
+    }
+    for i, field in enumerate(('work', 'reps', 'rest', 'order')):
+        cols[field] = data[:, i].copy()
+    normalize_units(cols, unit)
+    return cols
+
+
+def normalize_units(cols, unit=MassUnit.kgs):
+    """Convert the ``work`` column to a single unit of mass, in place."""
+    unit = MassUnit(unit)
+    if unit == MassUnit.kgs:
+        other, convert = MassUnit.lbs, lbs2kg
+    else:
+        other, convert = MassUnit.kgs, kgs2lbs
+    masses = [mass_unit(u) for u in cols['unit']]
+    convert_mask = np.array([m == other for m in masses], dtype=bool)
+    if convert_mask.any():
+        work = cols['work']
+        work[convert_mask] = np.fromiter(convert(work[convert_mask]),
+                                         dtype=work.dtype)
+    cols['unit'][np.array([m is not None for m in masses], dtype=bool)] = \
+        unit.value
+    return cols
+
+
+def weekly_rollup(cols, mask=None):
+    """Sum tonnage and volume, and average intensity, per week.
+
+    Tonnage is ``work * reps``, volume is ``reps`` and intensity is tonnage
+    over volume (the rep-weighted mean of work). Weeks start on Monday, and
+    are keyed by that Monday's epoch time.
+
+    :kwarg mask: Boolean array of the rows to include. By default, only rows
+        whose ``unit`` is a unit of mass count; work in seconds, or reps
+        with no unit, isn't tonnage.
+    """
+    if mask is None:
+        mask = np.array([mass_unit(u) is not None for u in cols['unit']],
+                        dtype=bool)
+    work, reps = cols['work'][mask], cols['reps'][mask]
+    weeks = ((cols['timestamp'][mask] + MONDAY) // WEEK).astype(np.int64)
+    week, idx = np.unique(weeks, return_inverse=True)
+    tonnage = np.bincount(idx, weights=work * reps.astype(np.float64),
+                          minlength=len(week))
+    volume = np.bincount(idx, weights=reps, minlength=len(week))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        intensity = np.where(volume > 0, tonnage / volume, 0.)
+    return {
+        'week': week * WEEK - MONDAY,
+        'tonnage': tonnage,
+        'volume': volume,
+        'intensity': intensity,
+    }
+
+
+def _epoch(timestamp):
+    """Seconds since the epoch, taking naive datetimes as UTC.
+
+    ``datetime.timestamp`` would read them as local time, shifting late
+    sessions into the next UTC day, and so the next week.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
@@ -1,14 +1,16 @@
 from collections.abc import Iterable, Mapping
 from io import StringIO
-from pprint import pformat
+from sys import intern
 
-from crank.core.set import Set
+from crank.core.set import Set, SetArray
 from crank.core.set_v1 import parse_v1_sets
-from crank.core.tags import parse_tags
+from crank.core.tags import intern_tags, parse_tags
+from crank.util import trace
 from crank.util.logging import logger
 
 
 class Exercise:
+    __slots__ = ('name', '_sets', 'raw_sets', 'tags')
 
     def __init__(self,
                  name='',
@@ -26,19 +28,35 @@ class Exercise:
         else:
             self.raw_sets = None
 
+    @property
+    def sets(self):
+        return self._sets
+
+    @sets.setter
+    def sets(self, sets):
+        """Store Sets in columnar form; see :class:`SetArray`."""
+        if not isinstance(sets, SetArray):
+            sets = SetArray(sets)
+        self._sets = sets
+
     @classmethod
     def parse(cls, lines):
         ex = {}
-        ex['name'], remainder = parse_exercise_name(lines[0])
+        with trace.stage('exercise_name'):
+            ex['name'], remainder = parse_exercise_name(lines[0])
         lines = lines[1:]
         # Tags
-        ex['tags'], lines = parse_tags(lines)
+        with trace.stage('tags'):
+            ex['tags'], lines = parse_tags(lines)
         # Sets
         try:
-            ex['sets'], lines = Set.parse_sets(lines)
+            with trace.stage('sets'):
+                ex['sets'], lines = Set.parse_set_runs(lines)
         except ValueError:
-            ex['sets'], ex['raw_sets'] = parse_v1_sets(remainder)
-        return Exercise(**ex), lines
+            with trace.stage('sets_v1'):
+                ex['sets'], ex['raw_sets'] = parse_v1_sets(remainder)
+        with trace.stage('construct'):
+            return Exercise(**ex), lines
 
     @classmethod
     def parse_exercises(cls, lines):
@@ -63,7 +81,7 @@ class Exercise:
         d = {
             'name': self.name,
             'tags': self.tags,
-            'sets': [s.to_json() for s in self.sets]
+            'sets': self.sets.to_json()
         }
         if self.raw_sets:
             d['raw_sets'] = self.raw_sets
@@ -71,10 +89,11 @@ class Exercise:
 
     @classmethod
     def from_json(cls, d):
+        name, tags = d.get('name'), d.get('tags')
         return cls(**{
-            'name': d.get('name'),
-            'tags': d.get('tags'),
-            'sets': [Set.from_json(s) for s in d.get('sets', [])],
+            'name': intern(name) if name else name,
+            'tags': intern_tags(tags) if tags else None,
+            'sets': SetArray.from_json(d.get('sets', [])),
             'raw_sets': d.get('raw_sets')
         })
 
@@ -93,7 +112,7 @@ class Exercise:
         sio.write(self.name + ":\n")
         # Tags
         # - name: value
-        for t, v in self.tags:
+        for t, v in self.tags.items():
             sio.write('- ' + t + ': ' + v + '\n')
         # Sets
         # a,b,d-f) w x r, w x r, [rest] work x rep
@@ -103,6 +122,7 @@ class Exercise:
         return sio.getvalue()
 
     def __repr__(self):
+        from pprint import pformat
         return pformat(self.to_json())
 
 
@@ -110,8 +130,17 @@ def parse_exercise_name(line):
     try:
         name_sets = line.split(':')
         if len(name_sets) != 2:
-            return name_sets[0]
-        return name_sets[0], name_sets[1]
+            return intern(name_sets[0])
+        return intern(name_sets[0]), name_sets[1]
     except Exception:
         logger.exception('Error while parsing exercise name from %s', line)
         return line
+
+
+def normalize_name(name):
+    """Normalize an exercise name for lookups.
+
+    Case and runs of whitespace are ignored, so 'Front  squat' and
+    'front Squat' are the same exercise.
+    """
+    return ' '.join(name.split()).casefold()
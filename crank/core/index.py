@@ -0,0 +1,152 @@
+"""
+index.py
+===
+In-memory secondary indexes over a collection of Workouts.
+"""
+from collections import defaultdict
+
+from crank.core.exercise import normalize_name
+
+
+class ExerciseIndex:
+    """Inverted index from normalized exercise name to the Workouts, and the
+    Exercises within them, that contain it.
+
+    Workouts are keyed by timestamp, like the sorted set holding them, so
+    re-adding a Workout replaces its entries.
+    """
+
+    def __init__(self, workouts=()):
+        self.names = defaultdict(dict)  # name -> {Workout: [Exercise]}
+        self.indexed = {}  # Workout -> names it's indexed under
+        for w in workouts:
+            self.add(w)
+
+    def add(self, workout):
+        """Index a Workout's Exercises, replacing any previous entries."""
+        self.remove(workout)
+        names = set()
+        for ex in workout.exercises:
+            name = normalize_name(ex.name)
+            self.names[name].setdefault(workout, []).append(ex)
+            names.add(name)
+        self.indexed[workout] = names
+
+    def remove(self, workout):
+        """Drop a Workout's entries, if it's indexed."""
+        for name in self.indexed.pop(workout, ()):
+            entries = self.names[name]
+            entries.pop(workout, None)
+            if not entries:
+                del self.names[name]
+
+    def lookup(self, name):
+        """Return ``(Workout, Exercise)`` pairs for an exercise name, oldest
+        first."""
+        entries = self.names.get(normalize_name(name), {})
+        return [(w, ex) for w in sorted(entries) for ex in entries[w]]
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+
+class TagIndex:
+    """Index of tag keys and values, over Workouts and their Exercises.
+
+    Keys and values are normalized like exercise names, so ``unit: KG`` and
+    ``Unit: kg`` are the same tag. Exercises are indexed as ``(Workout,
+    position)``, as they aren't hashable themselves.
+    """
+
+    def __init__(self, workouts=()):
+        # (key, value) -> matches; value None matches any value for a key
+        self.workout_tags = defaultdict(set)
+        self.exercise_tags = defaultdict(set)
+        self.indexed = {}  # Workout -> ([tags], [(tag, position)])
+        for w in workouts:
+            self.add(w)
+
+    def add(self, workout):
+        """Index a Workout's tags and its Exercises', replacing any previous
+        entries."""
+        self.remove(workout)
+        w_tags = []
+        for tag in _tag_entries(workout.tags):
+            self.workout_tags[tag].add(workout)
+            w_tags.append(tag)
+        ex_tags = []
+        for i, ex in enumerate(workout.exercises):
+            for tag in _tag_entries(ex.tags):
+                self.exercise_tags[tag].add((workout, i))
+                ex_tags.append((tag, i))
+        self.indexed[workout] = (w_tags, ex_tags)
+
+    def remove(self, workout):
+        """Drop a Workout's entries, if it's indexed."""
+        w_tags, ex_tags = self.indexed.pop(workout, ((), ()))
+        for tag in w_tags:
+            _discard(self.workout_tags, tag, workout)
+        for tag, i in ex_tags:
+            _discard(self.exercise_tags, tag, (workout, i))
+
+    def filter_workouts(self, criteria):
+        """Return the Workouts tagged with every criterion, in order.
+
+        See :func:`parse_tag_filter` for ``criteria``.
+        """
+        return sorted(self._match(self.workout_tags, criteria))
+
+    def filter_exercises(self, criteria):
+        """Return ``(Workout, Exercise)`` pairs for the Exercises tagged with
+        every criterion, in order."""
+        return [(w, w.exercises[i]) for w, i in
+                sorted(self._match(self.exercise_tags, criteria))]
+
+    @staticmethod
+    def _match(postings, criteria):
+        if isinstance(criteria, str):
+            criteria = parse_tag_filter(criteria)
+        matches = [postings.get((normalize_name(k), _value(v)), set())
+                   for k, v in criteria.items()]
+        if not matches:
+            return set()
+        # Intersect from the rarest tag, so the work is bounded by it
+        matches.sort(key=len)
+        return matches[0].intersection(*matches[1:])
+
+
+def parse_tag_filter(expr):
+    """Parse a tag filter like ``'week == 2 and unit == kgs'``.
+
+    Returns a dict of key to required value; a bare key (``'comment'``)
+    matches any value, and is mapped to None.
+    """
+    criteria = {}
+    for cond in expr.split(' and '):
+        key, eq, value = cond.partition('==')
+        if not key.strip():
+            raise ValueError('Invalid tag filter: ' + expr)
+        criteria[key.strip()] = value.strip() if eq else None
+    return criteria
+
+
+def _value(value):
+    return None if value is None else normalize_name(str(value))
+
+
+def _tag_entries(tags):
+    for key, value in tags.items():
+        key = normalize_name(str(key))
+        yield key, None
+        yield key, _value(value)
+
+
+def _discard(postings, tag, item):
+    matches = postings.get(tag)
+    if matches is not None:
+        matches.discard(item)
+        if not matches:
+            del postings[tag]
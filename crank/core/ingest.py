@@ -0,0 +1,140 @@
+"""
+ingest.py
+===
+Ingest a directory of .wkt files, such as one log per month, into a single
+:class:`Workouts`, and keep it current as the files change.
+"""
+import fnmatch
+import os
+import time
+
+from crank.core.workouts import Workouts
+from crank.util.logging import logger
+
+PATTERN = '*.wkt'
+
+
+def parse_wkt_dir(directory, processes=None, pattern=PATTERN, wkts=None):
+    """Parse every file matching ``pattern`` in ``directory``.
+
+    Files are parsed concurrently by a pool of ``processes``; ``None`` uses
+    one process per CPU, and 1 parses in this process. Workouts are merged
+    into ``wkts``, or a new :class:`Workouts`. Where files share a
+    timestamp, the file whose name sorts last wins.
+    """
+    watcher = DirectoryWatcher(directory, wkts, pattern, processes)
+    watcher.poll()
+    return watcher.workouts
+
+
+class DirectoryWatcher:
+    """Keeps a :class:`Workouts` in step with a directory of .wkt files.
+
+    Each :meth:`poll` compares the modification time and size of every
+    matching file against the last poll, and re-parses only the files that
+    changed. Workouts from a changed file replace the ones it used to hold,
+    and a deleted file's Workouts are removed, all through
+    :meth:`Workouts.add` and :meth:`Workouts.remove`, so indexes and any
+    journal stay current.
+    """
+
+    def __init__(self, directory, wkts=None, pattern=PATTERN, processes=1):
+        self.directory = directory
+        self.workouts = Workouts() if wkts is None else wkts
+        self.pattern = pattern
+        self.processes = processes
+        self.stats = {}  # path -> (mtime_ns, size) when last parsed
+        self.sources = {}  # path -> {Workout: Workout} parsed from it
+
+    def files(self):
+        """Return the matching files in the directory, sorted by name."""
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if fnmatch.fnmatch(name, self.pattern) and
+            os.path.isfile(os.path.join(self.directory, name)))
+
+    def poll(self):
+        """Re-parse changed files; return the paths added, changed or removed.
+
+        A file that fails to parse is logged and left as it was, to be
+        retried on the next poll; it may have been caught mid-write.
+        """
+        current = {path: _stat(path) for path in self.files()}
+        changed = [path for path, stat in current.items()
+                   if self.stats.get(path) != stat]
+        removed = [path for path in self.stats if path not in current]
+        for path in removed:
+            self._replace(path, [])
+            del self.stats[path]
+        failed = []
+        for path, parsed in _parse_files(changed, self.processes):
+            if isinstance(parsed, Exception):
+                logger.warning('Failed to parse %s: %s', path, parsed)
+                failed.append(path)
+                continue
+            self._replace(path, parsed)
+            self.stats[path] = current[path]
+        return sorted(set(changed + removed) - set(failed))
+
+    def watch(self, interval=1.0):
+        """Poll every ``interval`` seconds, forever.
+
+        Yields the paths changed by each poll that found changes; stop by
+        breaking out of the loop.
+        """
+        while True:
+            changed = self.poll()
+            if changed:
+                yield changed
+            time.sleep(interval)
+
+    def _replace(self, path, parsed):
+        """Swap the Workouts last parsed from ``path`` for ``parsed``."""
+        old = self.sources.pop(path, {})
+        # The first block for a timestamp wins, as in parse_wkt_file
+        new = {}
+        for w in parsed:
+            new.setdefault(w, w)
+        if new:
+            self.sources[path] = new
+        for w in old:
+            if w in new:
+                continue
+            owner = self._owner(w)
+            if owner is None:
+                self.workouts.remove(w)
+            elif owner < path:  # Fall back to an earlier file's copy
+                self.workouts.add(self.sources[owner][w])
+        for w in new:
+            if self._owner(w) == path:
+                self.workouts.add(w)
+
+    def _owner(self, workout):
+        """The last-sorting file holding a Workout's timestamp, if any."""
+        owners = [path for path, ws in self.sources.items() if workout in ws]
+        return max(owners) if owners else None
+
+
+def _stat(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _parse_files(paths, processes=1):
+    """Yield ``(path, [Workout])`` for each file, or ``(path, exception)``
+    if it couldn't be parsed."""
+    if processes == 1 or len(paths) < 2:
+        for path in paths:
+            yield path, _parse_file(path)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        yield from zip(paths, executor.map(_parse_file, paths))
+
+
+def _parse_file(path):
+    try:
+        return list(Workouts.iter_wkt_file(path))
+    except Exception as e:
+        return e
@@ -0,0 +1,78 @@
+"""
+journal.py
+===
+Append-only journal of changes to a Workouts snapshot.
+
+Each line is a JSON record: ``{"op": "put", "workout": {...}}`` adds or
+replaces the Workout with that timestamp, and ``{"op": "del", "timestamp":
+...}`` removes it. Records are replayed over the snapshot when it's loaded.
+"""
+import json
+import os
+
+from crank.util.logging import logger
+
+PUT, DEL = 'put', 'del'
+SUFFIX = '.journal'
+
+
+def journal_file(filename):
+    """Path of the journal for a Workouts snapshot file."""
+    return filename + SUFFIX
+
+
+def append(filename, changes):
+    """Append ``(op, Workout)`` changes to a journal file.
+
+    The file is flushed and synced before returning, so saved changes
+    survive a crash.
+    """
+    with open(filename, 'a') as fp:
+        for op, w in changes:
+            if op == PUT:
+                record = {'op': PUT, 'workout': w.to_json()}
+            else:
+                record = {'op': DEL, 'timestamp': w.to_json()['timestamp']}
+            fp.write(json.dumps(record) + '\n')
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def read(filename):
+    """Yield the records of a journal file, if it exists.
+
+    A last record that can't be decoded was torn by a crash mid-append. It's
+    logged and truncated away, so later appends start on a clean line. An
+    undecodable record anywhere else raises ``ValueError``.
+    """
+    if not os.path.exists(filename):
+        return
+    offset, torn = 0, None
+    with open(filename, 'rb') as fp:
+        for line in fp:
+            if not line.strip():
+                if torn is None:
+                    offset += len(line)
+                continue
+            if torn is not None:
+                raise torn
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                torn = e
+                continue
+            offset += len(line)
+            yield record
+    if torn is not None:
+        logger.warning('Dropping a torn record at the end of %s: %s',
+                       filename, torn)
+        with open(filename, 'r+b') as fp:
+            fp.truncate(offset)
+
+
+def remove(filename):
+    """Delete a journal file once it's been merged into a snapshot."""
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
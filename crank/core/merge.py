@@ -0,0 +1,75 @@
+"""
+merge.py
+===
+Merge imported Workouts into a collection without losing conflicts.
+
+Workouts are keyed by timestamp alone, so adding a second workout with a
+timestamp that's already taken silently replaces, or is replaced by, the
+first. :func:`merge` instead sorts every incoming Workout into one of three
+piles: new, identical to the one already held (by
+:meth:`Workout.fingerprint`), or conflicting with it.
+"""
+from datetime import datetime
+
+
+class MergeReport:
+    """Outcome of merging Workouts into a collection."""
+
+    def __init__(self):
+        self.new = []
+        self.identical = []
+        self.conflicts = []  # [(held Workout, incoming Workout)]
+
+    def write(self, fp):
+        """Write a plain-text report to a file object."""
+        fp.write('{:d} new, {:d} identical, {:d} conflicting.\n'.format(
+            len(self.new), len(self.identical), len(self.conflicts)))
+        if not self.conflicts:
+            return
+        fp.write('\nConflicts\n=========\n')
+        for held, incoming in self.conflicts:
+            ts = held.timestamp
+            if isinstance(ts, datetime):
+                ts = ts.strftime('%Y-%m-%d %H:%M')
+            fp.write('{}\n'.format(ts))
+            for label, w in (('held', held), ('incoming', incoming)):
+                fp.write('    {:9} {} [{}] {}\n'.format(
+                    label + ':', w.fingerprint()[:10],
+                    ', '.join('{}: {}'.format(k, v)
+                              for k, v in sorted(w.tags.items())),
+                    '; '.join(ex.name for ex in w.exercises)))
+
+
+def merge(wkts, incoming, replace=False):
+    """Merge ``incoming`` Workouts into ``wkts``, returning a MergeReport.
+
+    New Workouts are added. One whose timestamp is already held is
+    identical if its fingerprint matches, and is otherwise a conflict; the
+    held Workout is kept unless ``replace`` is set. Duplicates within
+    ``incoming`` are compared the same way.
+
+    Runs in one pass over each collection. Fingerprints are only computed
+    for colliding timestamps, once per Workout.
+    """
+    # Workout -> [held Workout, its fingerprint once computed]
+    held = {w: [w, None] for w in wkts.workouts}
+    report = MergeReport()
+    for w in incoming:
+        entry = held.get(w)
+        if entry is None:
+            report.new.append(w)
+            held[w] = [w, None]
+            wkts.add(w)
+            continue
+        current, current_fp = entry
+        if current_fp is None:
+            current_fp = entry[1] = current.fingerprint()
+        w_fp = w.fingerprint()
+        if w_fp == current_fp:
+            report.identical.append(w)
+            continue
+        report.conflicts.append((current, w))
+        if replace:
+            held[w] = [w, w_fp]
+            wkts.add(w)
+    return report
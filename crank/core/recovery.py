@@ -0,0 +1,263 @@
+"""
+recovery.py
+===
+Batch recovery of legacy (v1) Set strings left in ``Exercise.raw_sets``.
+
+Each string is tokenized and partitioned into ``(work, reps)`` runs like
+:func:`crank.core.set_v1.set_parsing_pipeline`. The hard part is the run
+of numbers between two ``x`` tokens: in ``100 x 5, 7, 70, 80 x 6`` the
+``5, 7`` are reps at 100 and ``70, 80`` are new work values. Where a run
+has more than one place it could split, the ``max_slope`` and
+``work_rep_sim`` heuristics are computed for every such run in the batch at
+once, with NumPy. Splits the heuristics agree on, by a clear margin, are
+recovered automatically; the rest are left for
+:func:`crank.guide.fix_workouts`.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from crank.core.set_v1 import (process_rep, process_set_partitions,
+                               string_tokenizer)
+
+
+class Recovery:
+    """Outcome of recovering one raw Set string."""
+    RECOVERED, AMBIGUOUS, FAILED = 'recovered', 'ambiguous', 'failed'
+
+    def __init__(self, raw, status, sets=None, reason=''):
+        self.raw = raw
+        self.status = status
+        self.sets = sets or []
+        self.reason = reason
+
+    @property
+    def recovered(self):
+        return self.status == self.RECOVERED
+
+    def __repr__(self):
+        return 'Recovery({!r}, {!r}, {} sets)'.format(
+            self.raw, self.status, len(self.sets))
+
+
+class RecoveryReport:
+    """Recoveries of the raw Set strings in a collection of Workouts."""
+
+    def __init__(self, entries=None):
+        self.entries = entries or []  # [(Workout, Exercise, Recovery)]
+
+    @property
+    def recovered(self):
+        return [e for e in self.entries if e[2].recovered]
+
+    @property
+    def pending(self):
+        """Entries that still need a human."""
+        return [e for e in self.entries if not e[2].recovered]
+
+    def write(self, fp):
+        """Write a plain-text report to a file object."""
+        fp.write('Recovered {:d} of {:d} set strings automatically; '
+                 '{:d} need review.\n'.format(len(self.recovered),
+                                              len(self.entries),
+                                              len(self.pending)))
+        for title, entries in (('Recovered', self.recovered),
+                               ('Needs review', self.pending)):
+            if not entries:
+                continue
+            fp.write('\n{}\n{}\n'.format(title, '=' * len(title)))
+            for w, ex, rec in entries:
+                ts = w.timestamp
+                if isinstance(ts, datetime):
+                    ts = ts.strftime('%Y-%m-%d %H:%M')
+                fp.write('{} {}: {!r}\n'.format(ts, ex.name, rec.raw))
+                if rec.sets:
+                    fp.write('    -> ' +
+                             ', '.join(str(s) for s in rec.sets) + '\n')
+                if rec.reason:
+                    fp.write('    ({}: {})\n'.format(rec.status, rec.reason))
+
+
+def recover_workouts(wkts, processes=1, threshold=0.5, apply=True):
+    """Recover the raw Set strings of every Exercise in a Workouts.
+
+    With ``apply``, recovered Sets replace the raw strings and the
+    Workouts are marked as touched; the others are left as they were.
+
+    :return: :class:`RecoveryReport`
+    """
+    found = [(w, ex) for w in wkts.workouts for ex in w.exercises
+             if ex.raw_sets]
+    recoveries = recover_all([ex.raw_sets for _, ex in found],
+                             processes=processes, threshold=threshold)
+    report = RecoveryReport()
+    touched = []
+    for (w, ex), rec in zip(found, recoveries):
+        report.entries.append((w, ex, rec))
+        if apply and rec.recovered:
+            ex.sets = rec.sets
+            ex.raw_sets = ''
+            if not touched or touched[-1] is not w:
+                touched.append(w)
+    for w in touched:
+        wkts.touch(w)
+    return report
+
+
+def recover_all(raws, processes=1, threshold=0.5, chunksize=1000):
+    """Recover many raw Set strings, optionally in a process pool.
+
+    ``processes`` works as in :meth:`Workouts.parse_wkt_file`. Each worker
+    recovers a chunk of strings as one batch.
+    """
+    if processes == 1 or len(raws) <= chunksize:
+        return recover_sets(raws, threshold)
+    chunks = [raws[i:i+chunksize] for i in range(0, len(raws), chunksize)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(recover_sets, chunks,
+                               [threshold] * len(chunks))
+        return [rec for chunk in results for rec in chunk]
+
+
+def recover_sets(raws, threshold=0.5):
+    """Recover a batch of raw Set strings.
+
+    :return: A :class:`Recovery` per string, in order.
+    """
+    lexed, errors = [], {}
+    for i, raw in enumerate(raws):
+        try:
+            lexed.append(split_runs(raw))
+        except ValueError as e:
+            lexed.append(None)
+            errors[i] = str(e)
+
+    # Runs that could split in more than one place, across the batch
+    ambiguous = [(i, j) for i, runs in enumerate(lexed) if runs
+                 for j in range(1, len(runs) - 1) if len(runs[j][1]) > 2]
+    if ambiguous:
+        reps = [lexed[i][j][1] for i, j in ambiguous]
+        work = [lexed[i][j - 1][1][-1] for i, j in ambiguous]
+        splits, confidence = max_slopes(reps)
+        sim_splits = work_rep_sims(work, reps)
+    splits_at = {}
+    unsure = set()
+    for k, (i, j) in enumerate(ambiguous):
+        splits_at[i, j] = int(splits[k])
+        if splits[k] != sim_splits[k] or confidence[k] < threshold:
+            unsure.add(i)
+
+    recoveries = []
+    for i, raw in enumerate(raws):
+        if lexed[i] is None:
+            recoveries.append(Recovery(raw, Recovery.FAILED,
+                                       reason=errors[i]))
+            continue
+        try:
+            parts = partition_runs(lexed[i], {j: s for (n, j), s in
+                                              splits_at.items() if n == i})
+            sets = process_set_partitions(parts)
+        except (TypeError, ValueError) as e:
+            recoveries.append(Recovery(raw, Recovery.FAILED, reason=str(e)))
+            continue
+        if i in unsure:
+            recoveries.append(Recovery(raw, Recovery.AMBIGUOUS, sets,
+                                       'unsure where reps end and work '
+                                       'starts'))
+        else:
+            recoveries.append(Recovery(raw, Recovery.RECOVERED, sets))
+    return recoveries
+
+
+def split_runs(raw):
+    """Split a raw Set string into the runs of values around each 'x'.
+
+    Returns a list of ``(tokens, values)`` pairs, one per run, where values
+    are the run's numbers (the last rep of a rep like ``5/3/2``).
+
+    :raises ValueError: If the string can't be a v1 Set string.
+    """
+    runs, tokens = [], []
+    for token in string_tokenizer(raw):
+        if token == 'x':
+            runs.append(tokens)
+            tokens = []
+        else:
+            tokens.append(token)
+    runs.append(tokens)
+    if len(runs) < 2:
+        raise ValueError("No 'x' in {!r}".format(raw))
+    valued = []
+    for j, run in enumerate(runs):
+        if not run or (0 < j < len(runs) - 1 and len(run) < 2):
+            raise ValueError('Missing work or reps in {!r}'.format(raw))
+        values = []
+        for k, token in enumerate(run):
+            rep = process_rep(token) if k == 0 and j else None
+            if rep:
+                values.append(rep[-1])
+            elif token.isdigit():
+                values.append(int(token))
+            else:
+                raise ValueError('Unexpected {!r} in {!r}'.format(token, raw))
+        valued.append((tuple(run), values))
+    return valued
+
+
+def partition_runs(runs, splits):
+    """Convert runs into ``(work, reps)`` partitions.
+
+    ``splits`` maps the index of each run with more than one possible
+    split to the position of its first work value; other middle runs are
+    one rep followed by one work value.
+    """
+    parts = []
+    work = tuple(int(t) for t in runs[0][0])
+    for j in range(1, len(runs)):
+        tokens = runs[j][0]
+        split = len(tokens) if j == len(runs) - 1 else splits.get(j, 1)
+        reps = []
+        for k, token in enumerate(tokens[:split]):
+            rep = process_rep(token) if k == 0 else (int(token),)
+            reps.extend(rep)
+        parts.append((work, tuple(reps)))
+        work = tuple(int(t) for t in tokens[split:])
+    return parts
+
+
+def _pad(rows):
+    """Stack uneven rows into a float array, padded with NaN."""
+    arr = np.full((len(rows), max(map(len, rows))), np.nan)
+    for i, row in enumerate(rows):
+        arr[i, :len(row)] = row
+    return arr
+
+
+def max_slopes(rows):
+    """Vectorized :func:`crank.core.set_v1.max_slope` over uneven rows.
+
+    Returns the index of the maximum slope in each row, and how clearly it
+    wins: 1 minus the ratio of the runner-up slope to it.
+    """
+    slopes = np.abs(np.diff(_pad(rows), axis=1))
+    slopes = np.nan_to_num(slopes, nan=-1.0)
+    idx = slopes.argmax(axis=1) + 1
+    ranked = np.sort(slopes, axis=1)
+    best, second = ranked[:, -1], np.maximum(ranked[:, -2], 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        confidence = np.where(best > 0, 1 - second / best, 0.0)
+    return idx, confidence
+
+
+def work_rep_sims(work, rows):
+    """Vectorized :func:`crank.core.set_v1.work_rep_sim`.
+
+    Returns the index of the first value in each row that is closer to the
+    row's work value than to its first rep, or the row's length if none is.
+    """
+    arr = _pad(rows)
+    w = np.asarray(work, dtype=float)[:, np.newaxis]
+    closer = np.abs(w - arr) < np.abs(arr[:, :1] - arr)
+    lengths = np.array([len(row) for row in rows])
+    return np.where(closer.any(axis=1), closer.argmax(axis=1), lengths)
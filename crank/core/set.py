@@ -1,13 +1,8 @@
-import copy
-import itertools
 import re
+from array import array
+from collections.abc import MutableSequence, Sequence
 
 
-SET_ORDERING_RE = re.compile(r'''
-    \s*
-    (?P<order>[\d\s,-]+)\)
-    \s*
-    ''', re.X)
 SET_RE = re.compile(r'''
     (\[(?P<rest>\d+)\])?
     \s*
@@ -15,9 +10,20 @@ SET_RE = re.compile(r'''
     \s*
     (?P<reps>\d+)
     ''', re.X)
+# Lexer tokens for the ordering prefix of a set line, e.g. ``1,3-5, 7)``.
+# Each match consumes one order item and the separator (or closing paren)
+# that follows it.
+ORDER_START_RE = re.compile(r'[\s,]*')
+ORDER_ITEM_RE = re.compile(r'''
+    (?P<start>\d+)
+    (-(?P<end>\d+))?
+    \s*
+    ((?P<close>[\s,]*\)\s*) | ,\s*)
+    ''', re.X)
 
 
 class Set:
+    __slots__ = ('work', 'reps', 'rest', 'order')
 
     def __init__(self,
                  work=0,
@@ -35,51 +41,67 @@ class Set:
 
     @classmethod
     def parse(cls, string):
-        # parse ordering groups
-        order_groups, set_str = parse_ordering(string)
-        # parse set information
-        sets = parse_set_body(set_str)
+        return [s for run in cls.parse_runs(string) for s in run]
+
+    @staticmethod
+    def parse_runs(string):
+        """Parse a set line into :class:`SetRun` s, without expanding them.
 
-        final = []
+        ``1-50) [30] 100 x 5`` is a single run, however many Sets it holds.
+        """
+        order_groups, pos = lex_ordering(string)
+        sets = lex_set_body(string, pos)
+
+        runs = []
         # Many-to-one order-to-set notation
         #   4-6) [30] 114 x 8
         if len(sets) == 1 and len(order_groups) >= 1:
-            base = sets[0]
-            for o in itertools.chain(*order_groups):
-                s = copy.copy(base)
-                s.order = o
-                final.append(s)
+            work, reps, rest = sets[0]
+            for start, count in order_groups:
+                runs.append(SetRun(work, reps, rest, start, count))
         # One-to-one order-to-set notation
         #   1-3,5-7) 100 x 8, 110x9
         elif len(order_groups) == len(sets):
-            for i, og in enumerate(order_groups):  # [(1,2,3), (5,6,7)]
-                for o in og:  # (1,2,3)
-                    s = copy.copy(sets[i])
-                    s.order = o
-                    final.append(s)
+            for (start, count), (work, reps, rest) in zip(order_groups, sets):
+                runs.append(SetRun(work, reps, rest, start, count))
         # One-to-Many notation
         #   1-3) 100x8, 110x7, 120x 6
         elif (len(order_groups) == 1 and
-              len(order_groups[0]) == len(sets)):
-            for i, o in enumerate(order_groups[0]):
-                sets[i].order = o
-                final.append(sets[i])
+              order_groups[0][1] == len(sets)):
+            start = order_groups[0][0]
+            for i, (work, reps, rest) in enumerate(sets):
+                runs.append(SetRun(work, reps, rest, start + i))
         else:
             raise ValueError("Set notation mismatch")
-        return final
+        return runs
 
     @classmethod
     def parse_sets(cls, lines):
-        """Parse a .wkt-formatted string containing one or more Sets."""
-        sets = []
+        """Parse a .wkt-formatted string containing one or more Sets.
+
+        Parsing stops at the first line that isn't a set line, such as the
+        next exercise; it's returned with the rest of the unparsed lines.
+        """
+        runs, lines = cls.parse_set_runs(lines)
+        return [s for run in runs for s in run], lines
+
+    @classmethod
+    def parse_set_runs(cls, lines):
+        """Like :meth:`parse_sets`, but returns :class:`SetRun` s."""
+        runs = []
+        n = 0
         for l in lines:
-            ret = cls.parse(l)
+            try:
+                ret = cls.parse_runs(l)
+            except ValueError:
+                break
             if not ret:
                 break
-            sets.extend(ret)
-        if not sets:
+            runs.extend(ret)
+            n += 1
+        if not runs:
             raise ValueError("No sets parsed")
-        return sets, lines[len(sets):]
+        return runs, lines[n:]
 
     def to_json(self):
         d = {}
@@ -125,35 +147,282 @@ class Set:
                 "order={set.order})").format(set=self)
 
 
+class SetRun:
+    """Identical Sets over a range of consecutive orders.
+
+    ``1-50) [30] 100 x 5`` is ``SetRun(100, 5, 30, order=1, count=50)``.
+    Iterating a run yields its Sets; nothing is expanded before then. A run
+    of unordered Sets, such as a legacy ``100 x 3 (5)``, has order ``None``
+    and its Sets all have order 0; ``0-2)`` is an ordered run from 0. A
+    single Set is both, so a run of one takes order 0 for ``None``.
+    """
+    __slots__ = ('work', 'reps', 'rest', 'order', 'count')
+
+    def __init__(self, work=0, reps=0, rest=0, order=None, count=1):
+        self.work = work or 0
+        self.reps = reps or 0
+        self.rest = rest or 0
+        self.order = 0 if order is None and count == 1 else order
+        self.count = count
+
+    @property
+    def label(self):
+        """The run's order range, as written in .wkt: '1-3', or '4'."""
+        if self.count == 1 or self.order is None:
+            return str(self.order or 0)
+        return '{:d}-{:d}'.format(self.order, self.order + self.count - 1)
+
+    def rows(self):
+        """The run's Sets as packed :class:`SetArray` rows."""
+        rows = array(SetArray.typecode,
+                     (self.work, self.reps, self.rest, self.order or 0))
+        rows *= self.count
+        if self.order is not None:
+            rows[3::SetArray.width] = array(
+                SetArray.typecode,
+                range(self.order, self.order + self.count))
+        return rows
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        if self.order is None:
+            orders = [0] * self.count
+        else:
+            orders = range(self.order, self.order + self.count)
+        for order in orders:
+            yield Set(self.work, self.reps, self.rest, order)
+
+    def to_json(self):
+        d = Set.to_json(self)
+        if self.count != 1:
+            d['count'] = self.count
+            if self.order == 0:
+                d['order'] = 0
+        return d
+
+    @classmethod
+    def from_json(cls, d):
+        return cls(**d)
+
+    def __eq__(self, other):
+        if not isinstance(other, SetRun):
+            return NotImplemented
+        return (self.work, self.reps, self.rest, self.order, self.count) == \
+            (other.work, other.reps, other.rest, other.order, other.count)
+
+    def __repr__(self):
+        return ("SetRun(work={run.work}, reps={run.reps}, rest={run.rest}, "
+                "order={run.order}, count={run.count})").format(run=self)
+
+
+class SetArray(MutableSequence):
+    """Compact, array-backed storage for an Exercise's Sets.
+
+    Work, reps, rest and order are packed as ints into a single typed
+    ``array`` instead of one object per Set; most Exercises only have a
+    handful of Sets, so one array beats four in overhead. Columns are
+    available as strided slices, e.g. ``sets.column('work')``.
+
+    Indexing and iteration build :class:`Set` objects on demand. They're
+    copies, so write changes back by assigning them.
+
+    :class:`SetRun` s can be added like Sets; they're packed without
+    building a Set per order. JSON collapses rows back into runs, which
+    carry a ``count`` when they hold more than one Set.
+    """
+    __slots__ = ('data',)
+    typecode = 'i'
+    fields = ('work', 'reps', 'rest', 'order')
+    width = len(fields)
+
+    def __init__(self, sets=()):
+        self.data = array(self.typecode)
+        self.extend(sets)
+
+    def __len__(self):
+        return len(self.data) // self.width
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SetArray(self[j] for j in range(*i.indices(len(self))))
+        i = self._offset(i)
+        return Set(*self.data[i:i+self.width])
+
+    def __setitem__(self, i, s):
+        if isinstance(i, slice):
+            raise TypeError("SetArray doesn't support slice assignment")
+        i = self._offset(i)
+        self.data[i:i+self.width] = _row(s)
+
+    def __delitem__(self, i):
+        if isinstance(i, slice):
+            for j in sorted(range(*i.indices(len(self))), reverse=True):
+                del self[j]
+            return
+        i = self._offset(i)
+        del self.data[i:i+self.width]
+
+    def __iter__(self):
+        data, width = self.data, self.width
+        for i in range(0, len(data), width):
+            yield Set(*data[i:i+width])
+
+    def insert(self, i, s):
+        i = min(max(i + len(self) if i < 0 else i, 0), len(self))
+        i *= self.width
+        self.data[i:i] = _row(s)
+
+    def append(self, s):
+        self.data.extend(_row(s))
+
+    def extend(self, sets):
+        for s in sets:
+            self.data.extend(s.rows() if isinstance(s, SetRun) else _row(s))
+
+    def runs(self):
+        """Collapse the Sets into :class:`SetRun` s; see :func:`set_runs`."""
+        data, width = self.data, self.width
+        return _runs(zip(*(data[i::width] for i in range(width))))
+
+    def column(self, field):
+        """Return one field of every Set as an array."""
+        return self.data[self.fields.index(field)::self.width]
+
+    def to_json(self):
+        return [run.to_json() for run in self.runs()]
+
+    @classmethod
+    def from_json(cls, items):
+        """Build a SetArray from a list of JSON objects (dicts).
+
+        Objects with a ``count`` are :class:`SetRun` s.
+        """
+        sets = cls()
+        if not any('count' in d for d in items):
+            sets.data.extend(d.get(f, 0) for d in items for f in cls.fields)
+            return sets
+        for d in items:
+            if 'count' in d:
+                sets.data.extend(SetRun.from_json(d).rows())
+            else:
+                sets.data.extend(d.get(f, 0) for f in cls.fields)
+        return sets
+
+    def _offset(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('SetArray index out of range')
+        return i * self.width
+
+    def __eq__(self, other):
+        if isinstance(other, SetArray):
+            return self.data == other.data
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return 'SetArray({!r})'.format(list(self))
+
+
+def _row(s):
+    return array(SetArray.typecode, (s.work, s.reps, s.rest, s.order))
+
+
+def set_runs(sets):
+    """Collapse Sets into :class:`SetRun` s.
+
+    Consecutive Sets join a run when their orders follow on from each other
+    and their work, reps and rest are the same.
+    """
+    return _runs((s.work, s.reps, s.rest, s.order) for s in sets)
+
+
+def _runs(rows):
+    runs = []
+    run = None
+    for work, reps, rest, order in rows:
+        if (run is not None and work == run.work and reps == run.reps and
+                rest == run.rest and _follows(run, order)):
+            if order == run.order:  # A second order 0: unordered Sets
+                run.order = None
+            run.count += 1
+        else:
+            run = SetRun(work, reps, rest, order)
+            runs.append(run)
+    return runs
+
+
+def _follows(run, order):
+    """Whether a Set with ``order`` continues ``run``."""
+    if run.order is None:
+        return order == 0
+    return (order == run.order + run.count or
+            order == run.order == 0 and run.count == 1)
+
+
+def group_sets_by_order(sets):
+    """Group Sets into runs labelled by order range.
+
+    Returns a list like ``[('1-3', (Set, Set, Set)), ('5', (Set,))]``.
+    """
+    return [(run.label, tuple(run)) for run in set_runs(sets)]
+
+
 def parse_ordering(string):
-    m = SET_ORDERING_RE.match(string)
-    if not m:
-        raise ValueError(string + " isn't a recognized set string")
-    parts = m.groupdict()['order'].strip(', ')
-    ordering = []
-    for s in parts.split(','):
-        val = s.strip()
-        try:
-            ordering.append((int(val),))
-        except ValueError:
-            n = re.match(r'(\d+)-(\d+)', val)
-            if not n:
-                raise
-            # 'a-d) ...' => (a,b,c,d)
-            ordering.append(tuple(range(int(n.groups()[0]),
-                                        int(n.groups()[1])+1)))
-    return ordering, m.string[m.end():]
+    """Parse the ordering prefix of a set string.
+
+    Returns a list of order tuples and the unparsed remainder of the string.
+    """
+    ordering, pos = lex_ordering(string)
+    return ([tuple(range(start, start + count)) for start, count in ordering],
+            string[pos:])
 
 
 def parse_set_body(string):
-    sets = []
-    for m in SET_RE.finditer(string):
-        gd = m.groupdict()
-        # Pass it through the Set Constructor to filter out values
-        vals = {}
-        for attr in ['work', 'reps', 'rest']:
-            v = gd.get(attr)
-            if v:
-                vals[attr] = int(v)
-        sets.append(Set(**vals))
-    return sets
+    """Parse the Sets following an ordering prefix."""
+    return [Set(work, reps, rest) for work, reps, rest in
+            lex_set_body(string)]
+
+
+def lex_ordering(string):
+    """Scan the ordering prefix of a set string in a single pass.
+
+    Returns a list of ``(start, count)`` order ranges, e.g. ``[(1, 1),
+    (3, 3)]`` for ``1,3-5)``, and the position in the string where the set
+    body begins. Ranges aren't expanded, so this is linear in the number of
+    ranges, not Sets.
+
+    Unlike the regex and ``str.split`` parser this replaced, negative orders,
+    reversed ranges such as ``5-3`` and anything between a range and the next
+    comma are rejected with ``ValueError``. Any whitespace, not just spaces,
+    may come before the closing parenthesis.
+    """
+    pos = ORDER_START_RE.match(string).end()
+    ordering = []
+    while True:
+        m = ORDER_ITEM_RE.match(string, pos)
+        if not m:
+            raise ValueError(string + " isn't a recognized set string")
+        start, end, close = m.group('start', 'end', 'close')
+        if end is None:
+            ordering.append((int(start), 1))
+        else:
+            if int(end) < int(start):
+                raise ValueError(string + " has a reversed order range")
+            # 'a-d) ...' => (a, d-a+1)
+            ordering.append((int(start), int(end) - int(start) + 1))
+        pos = m.end()
+        if close is not None:
+            return ordering, pos
+
+
+def lex_set_body(string, pos=0):
+    """Scan a set body into ``(work, reps, rest)`` tuples of ints."""
+    return [(int(work) if work else 0, int(reps), int(rest) if rest else 0)
+            for _, rest, _, work, reps in SET_RE.findall(string, pos)]
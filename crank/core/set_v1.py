@@ -1,8 +1,6 @@
 import re
 import textwrap
 
-import numpy as np
-
 from crank.core.set import Set
 from crank.util.logging import logger
 from crank.util.cli import confirm_input
@@ -130,9 +128,18 @@ def string_tokenizer(string):
         yield m.group().strip()
 
 
+# Debug output of process_sets' work and rep buffers
+_BUFFERS_LOG = textwrap.dedent("""
+    %s
+    ======
+    Work: %s
+    Reps: %s
+    """)
+
+
 def parse_complex_sets(string):
     """Iteratively parse a Set string."""
-    logger.debug("Parsing Sets from: {}".format(string))
+    logger.debug("Parsing Sets from: %s", string)
     parser = string_tokenizer(string)
 
     # All numbers up to the first X are work sets
@@ -142,9 +149,9 @@ def parse_complex_sets(string):
         if val == 'x':
             break
         work.append(val)
-        logger.debug("Parsed: {:s}".format(val))
+        logger.debug("Parsed: %s", val)
     # Assumption: All values up to the first 'x' have been parsed.
-    logger.debug("Pre-loaded work: {:s}".format(str(work)))
+    logger.debug("Pre-loaded work: %s", work)
 
     sets = []
     reps = []
@@ -154,7 +161,7 @@ def parse_complex_sets(string):
             work, reps, sets = process_sets(work, reps, sets)
         else:
             reps.append(val)
-            logger.debug("Reps: {:s}".format(str(reps)))
+            logger.debug("Reps: %s", reps)
     else:  # Final processing
         work, reps, sets = process_sets(work, reps, sets, eof=True)
     # Nothing should be left in the work or reps buffers
@@ -164,13 +171,7 @@ def parse_complex_sets(string):
 
 
 def process_sets(work, reps, sets, eof=False):
-    logger.debug(textwrap.dedent(
-        """
-        Before
-        ======
-        Work: {:s}
-        Reps: {:s}
-        """.format(str(work), str(reps))))
+    logger.debug(_BUFFERS_LOG, 'Before', work, reps)
 
     # import pdb
     # pdb.set_trace()
@@ -199,24 +200,18 @@ def process_sets(work, reps, sets, eof=False):
     # Reps should *always* get reset
     reps = []
 
-    logger.debug(textwrap.dedent(
-        """
-        After
-        ======
-        Work: {:s}
-        Reps: {:s}
-        """.format(str(work), str(reps))))
+    logger.debug(_BUFFERS_LOG, 'After', work, reps)
 
     return work, reps, sets
 
 
 def split_reps(w, reps):
-    logger.debug("Splitting {}".format(str(reps)))
+    logger.debug("Splitting %s", reps)
     if len(reps) < 2:
         return reps, []
     idx, _ = max_slope(reps)
     r, w = reps[:idx], reps[idx:]
-    logger.debug("\t{}\n\t{}".format(str(r), str(w)))
+    logger.debug("\t%s\n\t%s", r, w)
     return r, w
 
 
@@ -227,7 +222,7 @@ def demux_work(work, reps):
     the start of new work levels. For example, '20 x 12, 13, 25, 30 x 6' should
     recognize that 25 was weight performed for 6 reps, not 25 reps at 20 lbs.
     """
-    logger.debug("demux_work: {} x {}".format(work, str(reps)))
+    logger.debug("demux_work: %s x %s", work, reps)
     sets = []
     for w in work:
         sets.append(Set(work=w, reps=reps[0]))
@@ -236,6 +231,8 @@ def demux_work(work, reps):
 
 def max_err(w, reps):
     """Calculate the maximum error between the work value and rep values."""
+    import numpy as np
+
     def err(r, w):
         return abs((w-r)/w)
 
@@ -247,6 +244,8 @@ def max_err(w, reps):
 
 def max_slope(reps):
     """Find the maximum slope between two points in an array."""
+    import numpy as np
+
     slopes = [0]
     for i in range(1, len(reps)):
         slopes.append(abs(reps[i] - reps[i-1]))
@@ -254,6 +253,8 @@ def max_slope(reps):
 
 
 def work_rep_sim(work, reps):
+    import numpy as np
+
     def sim(a, b):
         """Similarity between a and b. Lower is better."""
         return abs(a-b)
@@ -0,0 +1,255 @@
+"""
+sqlite.py
+===
+SQLite storage for Workouts, with indexes for querying large histories.
+"""
+from datetime import datetime
+from sys import intern
+
+from crank.core import journal
+from crank.core.exercise import Exercise
+from crank.core.tags import intern_tag
+from crank.core.workout import Workout
+from crank.core.workouts import Workouts, _sortedset
+
+MAGIC = b'SQLite format 3\x00'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS workouts (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL UNIQUE,
+    parsed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS exercises (
+    id INTEGER PRIMARY KEY,
+    workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    raw_sets TEXT
+);
+CREATE TABLE IF NOT EXISTS sets (
+    exercise_id INTEGER NOT NULL REFERENCES exercises(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    work INTEGER NOT NULL,
+    reps INTEGER NOT NULL,
+    rest INTEGER NOT NULL,
+    "order" INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    workout_id INTEGER NOT NULL REFERENCES workouts(id) ON DELETE CASCADE,
+    exercise_id INTEGER REFERENCES exercises(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS workouts_parsed_timestamp
+    ON workouts(parsed, timestamp);
+CREATE INDEX IF NOT EXISTS exercises_workout ON exercises(workout_id);
+CREATE INDEX IF NOT EXISTS exercises_name
+    ON exercises(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS sets_exercise ON sets(exercise_id);
+CREATE INDEX IF NOT EXISTS tags_workout ON tags(workout_id);
+CREATE INDEX IF NOT EXISTS tags_key_value ON tags(key, value);
+'''
+
+
+def is_sqlite(prefix):
+    """Whether the leading bytes of a file are an SQLite database header."""
+    return prefix[:len(MAGIC)] == MAGIC
+
+
+class SQLiteWorkouts(Workouts):
+    """Workouts stored in an SQLite database.
+
+    ``save``, ``load``, iteration and ``length`` behave as for
+    :class:`Workouts`. The ``select_*`` methods query the database through
+    its indexes and only build the Workouts they return, so they work on a
+    store that was :meth:`open`-ed without loading anything into memory.
+    Iterating an opened store reads every Workout from the database.
+    """
+    default_file = 'workouts.db'
+
+    def __init__(self, filename=default_file, workouts=(), **kwargs):
+        super().__init__(filename, workouts, **kwargs)
+        self.fmt = 'sqlite'
+        # Every change is cheap to write, so always track them
+        self.journaled = True
+        self._db = None
+        self.changes = [(journal.PUT, w) for w in self.workouts]
+        # Whether self.workouts holds every Workout in the database, rather
+        # than none of them for an open()-ed store
+        self._loaded = True
+
+    @property
+    def length(self):
+        if self._loaded:
+            return len(self.workouts)
+        if not self.changes:
+            return self.count()
+        return len(self._current())
+
+    def __iter__(self):
+        return iter(self.workouts if self._loaded else self._current())
+
+    def remove(self, workout):
+        """Remove the Workout with the same timestamp as ``workout``.
+
+        It's deleted from the database on :meth:`save`, whether or not it
+        was loaded, e.g. when it came from a ``select_*`` query.
+        """
+        self.workouts.discard(workout)
+        self._record(journal.DEL, workout)
+
+    def _current(self):
+        """The database's Workouts, with unsaved changes applied."""
+        current = _sortedset(self.select())
+        for op, w in self.changes:
+            current.discard(w)
+            if op == journal.PUT:
+                current.add(w)
+        return current
+
+    @property
+    def db(self):
+        if self._db is None:
+            import sqlite3
+            self._db = sqlite3.connect(self.filename)
+            self._db.execute('PRAGMA foreign_keys = ON')
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def save(self, fmt=None):
+        """Write the changes since the last save to the database.
+
+        Changes are tracked through :meth:`add`, :meth:`remove` and
+        :meth:`touch`; ``fmt`` is ignored.
+        """
+        with self.db as db:
+            for op, w in self.changes:
+                db.execute('DELETE FROM workouts WHERE timestamp = ?',
+                           (_timestamp(w)[0],))
+                if op == journal.PUT:
+                    _insert(db, w)
+        self.changes = []
+
+    def compact(self, fmt=None):
+        self.save()
+        self.db.execute('VACUUM')
+
+    @classmethod
+    def open(cls, filename=default_file):
+        """Connect to a database without loading any Workouts."""
+        wkts = cls(filename)
+        wkts.db  # Create the schema if needed
+        wkts._loaded = False
+        return wkts
+
+    @classmethod
+    def load(cls, filename=default_file, journaled=False, lazy=False):
+        """Load every Workout in a database."""
+        wkts = cls.open(filename)
+        wkts.workouts.update(wkts.select())
+        wkts._loaded = True
+        return wkts
+
+    @classmethod
+    def from_workouts(cls, filename, wkts):
+        """Import Workouts (e.g. loaded from JSON) into a new database."""
+        return cls(filename, wkts.workouts)
+
+    def count(self):
+        """Number of Workouts in the database."""
+        return self.db.execute('SELECT COUNT(*) FROM workouts').fetchone()[0]
+
+    def select_between(self, start=None, end=None):
+        """Workouts with ``start <= timestamp < end``, in order."""
+        where, params = ['parsed = 1'], []
+        if start is not None:
+            where.append('timestamp >= ?')
+            params.append(start.isoformat())
+        if end is not None:
+            where.append('timestamp < ?')
+            params.append(end.isoformat())
+        return self.select(' AND '.join(where), params)
+
+    def select_exercise(self, name):
+        """Workouts containing an Exercise, matched case-insensitively."""
+        return self.select(
+            'id IN (SELECT workout_id FROM exercises '
+            'WHERE name = ? COLLATE NOCASE)', (name,))
+
+    def select_tag(self, key, value=None):
+        """Workouts tagged with ``key``, themselves or in an Exercise.
+
+        If ``value`` is given, the tag must also have that value.
+        """
+        sql = 'id IN (SELECT workout_id FROM tags WHERE key = ?'
+        params = [key]
+        if value is not None:
+            sql += ' AND value = ?'
+            params.append(value)
+        return self.select(sql + ')', params)
+
+    def select(self, where='1', params=()):
+        """Build the Workouts matching an SQL condition on ``workouts``."""
+        db = self.db
+        ids = 'SELECT id FROM workouts WHERE ' + where
+        workouts = {}
+        for wid, ts in db.execute('SELECT id, timestamp FROM workouts '
+                                  'WHERE {} ORDER BY timestamp'
+                                  .format(where), params):
+            workouts[wid] = Workout(ts)
+        exercises = {}
+        for eid, wid, name, raw_sets in db.execute(
+                'SELECT id, workout_id, name, raw_sets FROM exercises '
+                'WHERE workout_id IN ({}) ORDER BY workout_id, position'
+                .format(ids), params):
+            ex = Exercise(intern(name), raw_sets=raw_sets)
+            exercises[eid] = ex
+            workouts[wid].exercises.append(ex)
+        for row in db.execute(
+                'SELECT exercise_id, work, reps, rest, "order" FROM sets '
+                'WHERE exercise_id IN (SELECT id FROM exercises '
+                'WHERE workout_id IN ({})) ORDER BY exercise_id, position'
+                .format(ids), params):
+            exercises[row[0]].sets.data.extend(row[1:])
+        for wid, eid, key, value in db.execute(
+                'SELECT workout_id, exercise_id, key, value FROM tags '
+                'WHERE workout_id IN ({}) ORDER BY rowid'.format(ids),
+                params):
+            obj = workouts[wid] if eid is None else exercises[eid]
+            key, value = intern_tag(key, value)
+            obj.tags[key] = value
+        return list(workouts.values())
+
+
+def _timestamp(w):
+    """The stored timestamp of a Workout, and whether it was parsed."""
+    if isinstance(w.timestamp, datetime):
+        return w.timestamp.isoformat(), 1
+    return str(w.timestamp), 0
+
+
+def _insert(db, w):
+    cur = db.execute('INSERT INTO workouts (timestamp, parsed) VALUES (?, ?)',
+                     _timestamp(w))
+    wid = cur.lastrowid
+    db.executemany('INSERT INTO tags (workout_id, key, value) '
+                   'VALUES (?, ?, ?)',
+                   ((wid, k, v) for k, v in w.tags.items()))
+    for i, ex in enumerate(w.exercises):
+        cur = db.execute('INSERT INTO exercises '
+                         '(workout_id, position, name, raw_sets) '
+                         'VALUES (?, ?, ?, ?)',
+                         (wid, i, ex.name, ex.raw_sets))
+        eid = cur.lastrowid
+        db.executemany('INSERT INTO tags (workout_id, exercise_id, key, '
+                       'value) VALUES (?, ?, ?, ?)',
+                       ((wid, eid, k, v) for k, v in ex.tags.items()))
+        db.executemany('INSERT INTO sets VALUES (?, ?, ?, ?, ?, ?)',
+                       ((eid, j, s.work, s.reps, s.rest, s.order)
+                        for j, s in enumerate(ex.sets)))
@@ -1,3 +1,5 @@
+from sys import intern
+
 from crank.util.logging import logger
 
 
@@ -9,7 +11,8 @@ def parse_tags(lines):
             if len(parts) == 1:
                 tags['comment'] = parts[0].strip()
             else:
-                tags[parts[0]] = parts[1].strip()
+                key, value = intern_tag(parts[0], parts[1].strip())
+                tags[key] = value
         else:
             break
     if tags:
@@ -22,3 +25,22 @@ def parse_tag(line):
         return line.lstrip('- ').split(':')
     except:
         return line
+
+
+def intern_tag(key, value):
+    """Intern a tag's key and, if it's a string, its value.
+
+    Logs repeat a handful of keys and values, like ``unit: kgs``, thousands
+    of times over; interning keeps one copy of each. Free-text comments are
+    left alone.
+    """
+    if isinstance(value, str) and key != 'comment':
+        value = intern(value)
+    return intern(key), value
+
+
+def intern_tags(tags):
+    """Intern the keys and values of a tag dict; see :func:`intern_tag`."""
+    # Inlined, as this runs for every Workout and Exercise loaded
+    return {intern(k): v if k == 'comment' or not isinstance(v, str)
+            else intern(v) for k, v in tags.items()}
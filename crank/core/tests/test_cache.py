@@ -0,0 +1,52 @@
+import os
+import shutil
+
+from crank.core import cache
+from crank.core.cache import ParseCache
+from crank.core.workouts import Workouts
+
+
+parent = os.path.dirname(os.path.abspath(__file__))
+TEST_WKT_FILE = os.path.join(parent, 'fixtures', 'squat.wkt')
+
+
+def test_parse_cache(tmpdir):
+    cache_file = str(tmpdir.join('squat.cache'))
+    wkt_file = str(tmpdir.join('squat.wkt'))
+    shutil.copy(TEST_WKT_FILE, wkt_file)
+
+    wkts = Workouts.parse_wkt_file(wkt_file, cache=cache_file)
+    cache = ParseCache.load(cache_file)
+    assert len(cache.blocks) == 43
+
+    # Every block is served from the cache
+    wkts2 = Workouts.parse_wkt_file(wkt_file, cache=cache_file)
+    assert [w.to_json() for w in wkts2.workouts] == \
+        [w.to_json() for w in wkts.workouts]
+
+    # Edit the first block; only that block is re-parsed
+    with open(wkt_file) as fp:
+        text = fp.read()
+    with open(wkt_file, 'w') as fp:
+        fp.write(text.replace('Swing, KB: 28 x 35', 'Swing, KB: 32 x 30', 1))
+    cache = ParseCache.load(cache_file)
+    list(Workouts.iter_wkt_file(wkt_file, cache=cache))
+    assert (cache.hits, cache.misses) == (42, 1)
+    cache.save()
+    assert len(ParseCache.load(cache_file).blocks) == 43
+
+
+def test_parse_cache_version(tmpdir):
+    cache_file = str(tmpdir.join('squat.cache'))
+    Workouts.parse_wkt_file(TEST_WKT_FILE, cache=cache_file)
+    assert len(ParseCache.load(cache_file).blocks) == 43
+
+    # A cache from another parser version is never served
+    with open(cache_file) as fp:
+        lines = fp.readlines()
+    with open(cache_file, 'w') as fp:
+        fp.writelines(lines[1:])
+    assert ParseCache.load(cache_file).blocks == {}
+    with open(cache_file, 'w') as fp:
+        fp.writelines([cache.HEADER.format(cache.VERSION - 1)] + lines[1:])
+    assert ParseCache.load(cache_file).blocks == {}
@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from crank.core import columns
+from crank.core.exercise import Exercise
+from crank.core.set import Set
+from crank.core.workout import Workout
+
+
+TEST_WORKOUTS = [
+    Workout(datetime(2016, 4, 12, 15, 36), tags={'unit': 'kgs'}, exercises=[
+        Exercise('Deadlift', sets=[Set(100, 5, order=1),
+                                   Set(110, 3, order=2)]),
+        Exercise('Squat', tags={'unit': 'lbs x reps'},
+                 sets=[Set(225, 5, order=3)]),
+    ]),
+    Workout(datetime(2016, 4, 14, 13, 15), exercises=[
+        Exercise('Planche', tags={'unit': 'seconds'}, sets=[Set(28, 1)]),
+    ]),
+    Workout('Not a timestamp', exercises=[Exercise('Squat', sets=[Set(1)])]),
+]
+
+
+def test_to_columns():
+    cols = columns.to_columns(TEST_WORKOUTS)
+    assert cols['names'] == ['Deadlift', 'Squat', 'Planche']
+    assert list(cols['exercise']) == [0, 0, 1, 2]
+    assert list(cols['work']) == [100, 110, 102, 28]
+    assert list(cols['reps']) == [5, 3, 5, 1]
+    assert list(cols['order']) == [1, 2, 3, 0]
+    assert list(cols['unit']) == ['kgs', 'kgs', 'kgs', 'seconds']
+    assert cols['timestamp'][0] == TEST_WORKOUTS[0].timestamp.replace(
+        tzinfo=timezone.utc).timestamp()
+
+    lbs = columns.to_columns(TEST_WORKOUTS, 'lbs')
+    assert list(lbs['work']) == [220, 243, 225, 28]
+
+
+def test_weekly_rollup():
+    rollup = columns.weekly_rollup(columns.to_columns(TEST_WORKOUTS))
+    assert len(rollup['week']) == 1
+    monday = datetime.fromtimestamp(rollup['week'][0], timezone.utc)
+    assert monday.weekday() == 0
+    # The planche hold is in seconds, so it isn't counted
+    assert rollup['tonnage'][0] == 100 * 5 + 110 * 3 + 102 * 5
+    assert rollup['volume'][0] == 13
+    assert rollup['intensity'][0] == rollup['tonnage'][0] / 13
+
+    cols = columns.to_columns(TEST_WORKOUTS)
+    everything = columns.weekly_rollup(cols, np.ones(4, dtype=bool))
+    assert everything['volume'][0] == 14
+    assert len(columns.weekly_rollup(cols, np.zeros(4, dtype=bool))
+               ['week']) == 0
+
+
+def test_weekly_rollup_local_time(monkeypatch):
+    """Weeks follow the wall-clock date, whatever the local timezone."""
+    monkeypatch.setenv('TZ', 'America/Los_Angeles')
+    time.tzset()
+    try:
+        rollup = columns.weekly_rollup(columns.to_columns([
+            Workout(datetime(2016, 4, 11, 9), tags={'unit': 'kg'},
+                    exercises=[Exercise('Squat', sets=[Set(100, 5)])]),
+            Workout(datetime(2016, 4, 17, 20), tags={'unit': 'kg'},
+                    exercises=[Exercise('Squat', sets=[Set(100, 5)])]),
+        ]))
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    week, = rollup['week']
+    assert datetime.fromtimestamp(week, timezone.utc).date() == \
+        datetime(2016, 4, 11).date()
@@ -1,4 +1,5 @@
 from crank.core.exercise import Exercise
+from crank.core.set import Set, SetArray
 
 
 TEST_EXERCISE_LINES = [
@@ -75,6 +76,7 @@ def test_from_json():
     assert ex.tags == TEST_EXERCISE.tags
     assert ex.raw_sets == TEST_EXERCISE.raw_sets
     assert ex.sets == TEST_EXERCISE.sets
+    assert isinstance(ex.sets, SetArray)
 
 
 def test_encoding():
@@ -84,3 +86,29 @@ def test_encoding():
 def test_parsing_exercise_lines():
     exs = Exercise.parse_exercises(TEST_EXERCISE_LINES)
     assert len(exs) == 4
+
+
+def test_parsing_v2_exercise_lines():
+    lines = ['Squat:', '  1-3) 100 x 5', 'Bench:', '- unit: kg',
+             '  4) 60 x 8']
+    squat, bench = Exercise.parse_exercises(lines)
+    assert [s.order for s in squat.sets] == [1, 2, 3]
+    assert bench.tags == {'unit': 'kg'}
+    assert [s.to_json() for s in bench.sets] == \
+        [{'work': 60, 'reps': 8, 'order': 4}]
+
+
+def test_reversed_order_range():
+    # Not a v2 set line, so it falls back to the v1 parser
+    ex, lines = Exercise.parse(['Squat: 100 x 5', '  5-3) 100 x 5'])
+    assert [s.to_json() for s in ex.sets] == [{'work': 100, 'reps': 5}]
+    assert lines == ['  5-3) 100 x 5']
+
+
+def test_compact_objects():
+    ex, = Exercise.parse_exercises(TEST_EXERCISE_LINES[1:4])
+    assert not hasattr(ex, '__dict__')
+    assert not hasattr(Set(100, 5), '__dict__')
+    loaded = Exercise.from_json(ex.to_json())
+    assert loaded == ex
+    assert loaded.name is ex.name
@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+import pytest
+
+# Slow imports that parsing and the fto entry point shouldn't pay for
+DEFERRED = ('numpy', 'dateutil', 'colorama', 'blist', 'pprint')
+
+
+@pytest.mark.parametrize('module', ['crank.core.workouts',
+                                    'crank.program.fto.cli'])
+def test_heavy_imports_deferred(module):
+    code = ('import sys, {}; print(" ".join(m for m in {!r} '
+            'if m in sys.modules))'.format(module, DEFERRED))
+    out = subprocess.check_output([sys.executable, '-c', code],
+                                  universal_newlines=True)
+    assert out.split() == []
@@ -0,0 +1,37 @@
+import pytest
+
+from crank.core.exercise import Exercise
+from crank.core.index import TagIndex, parse_tag_filter
+from crank.core.workout import Workout
+
+
+def test_parse_tag_filter():
+    assert parse_tag_filter('week == 2 and unit == kgs') == \
+        {'week': '2', 'unit': 'kgs'}
+    assert parse_tag_filter('Training max==300 and comment') == \
+        {'Training max': '300', 'comment': None}
+    with pytest.raises(ValueError):
+        parse_tag_filter('week == 2 and == 3')
+
+
+def test_tag_index():
+    w1 = Workout('2016 Apr 12 @ 1536', tags={'week': '2'},
+                 exercises=[Exercise('Squat', tags={'unit': 'kgs'}),
+                            Exercise('Curl')])
+    w2 = Workout('2016 Apr 19 @ 1536', tags={'Week': 2, 'unit': 'KGS'},
+                 exercises=[Exercise('Squat', tags={'unit': 'lbs'})])
+    index = TagIndex([w2, w1])
+    assert index.filter_workouts({'week': 2}) == [w1, w2]
+    assert index.filter_workouts('week == 2 and unit == kgs') == [w2]
+    assert index.filter_workouts({'unit': None}) == [w2]
+    assert index.filter_exercises('unit') == \
+        [(w1, w1.exercises[0]), (w2, w2.exercises[0])]
+    assert index.filter_exercises('unit == lbs') == [(w2, w2.exercises[0])]
+    assert index.filter_workouts('missing') == []
+
+    w2.tags['Week'] = '3'
+    index.add(w2)
+    assert index.filter_workouts('week == 2') == [w1]
+    index.remove(w1)
+    assert index.filter_workouts('week == 2') == []
+    assert not index.workout_tags.get(('week', '2'))
@@ -0,0 +1,98 @@
+import os
+
+from crank.core.ingest import DirectoryWatcher
+from crank.core.workouts import Workouts
+from crank.util import stream
+from crank.util.time import parse_timestamp
+
+
+parent = os.path.dirname(os.path.abspath(__file__))
+TEST_WKT_FILE = os.path.join(parent, 'fixtures', 'squat.wkt')
+
+
+def split_by_month(directory):
+    """Write each month of the test log to its own file."""
+    months = {}
+    for block in stream.buffer_data(stream.stream_file(TEST_WKT_FILE)):
+        name = parse_timestamp(block[0]).strftime('%Y-%m.wkt')
+        months.setdefault(name, []).append('\n'.join(block))
+    for name, blocks in months.items():
+        with open(os.path.join(directory, name), 'w') as fp:
+            fp.write('\n\n'.join(blocks) + '\n')
+    return sorted(months)
+
+
+def write(path, text):
+    with open(path, 'w') as fp:
+        fp.write(text)
+    # Make sure the change shows even on coarse-grained mtimes
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_parse_wkt_dir(tmpdir):
+    months = split_by_month(str(tmpdir))
+    assert len(months) > 1
+    expected = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    for processes in (1, 2):
+        wkts = Workouts.parse_wkt_dir(str(tmpdir), processes=processes)
+        assert [w.to_json() for w in wkts] == \
+            [w.to_json() for w in expected]
+
+
+def test_directory_watcher(tmpdir):
+    directory = str(tmpdir)
+    first, second = [os.path.join(directory, m)
+                     for m in split_by_month(directory)[:2]]
+    watcher = DirectoryWatcher(directory)
+    assert len(watcher.poll()) > 2
+    wkts = watcher.workouts
+    total = wkts.length
+    history = len(wkts.exercise_history('Squat'))
+    assert watcher.poll() == []
+
+    # Drop a workout from one file; only that file is re-parsed
+    with open(first) as fp:
+        blocks = fp.read().strip().split('\n\n')
+    write(first, '\n\n'.join(blocks[1:]) + '\n')
+    assert watcher.poll() == [first]
+    assert wkts.length == total - 1
+    assert len(wkts.exercise_history('Squat')) < history
+
+    # The last file to hold a timestamp wins, until it's gone
+    timestamp = blocks[1].split('\n')[0]
+    with open(second, 'a') as fp:
+        fp.write('\n' + timestamp + '\nPull-ups: 10, 10, 10\n')
+    assert watcher.poll() == [second]
+    assert wkts.length == total - 1
+
+    def exercises():
+        w, = [w for w in wkts if w.timestamp == parse_timestamp(timestamp)]
+        return [ex.name for ex in w.exercises]
+    assert exercises() == ['Pull-ups']
+    os.remove(second)
+    assert watcher.poll() == [second]
+    assert exercises() != ['Pull-ups']
+
+
+def test_directory_watcher_duplicates(tmpdir):
+    directory = str(tmpdir)
+    first = os.path.join(directory, 'a.wkt')
+    second = os.path.join(directory, 'b.wkt')
+    write(first, '2016 Apr 12 @ 1536\nSquat: 100 x 5\n\n'
+                 '2016 Apr 12 @ 1536\nSquat: 200 x 5\n')
+    expected = [w.to_json() for w in Workouts.parse_wkt_file(first)]
+
+    def works():
+        return [[s.work for ex in w.exercises for s in ex.sets]
+                for w in watcher.workouts]
+    watcher = DirectoryWatcher(directory)
+    watcher.poll()
+    assert [w.to_json() for w in watcher.workouts] == expected
+    assert works() == [[100]]
+    write(second, '2016 Apr 12 @ 1536\nSquat: 150 x 5\n')
+    watcher.poll()
+    assert works() == [[150]]
+    os.remove(second)
+    watcher.poll()
+    assert works() == [[100]]
@@ -0,0 +1,82 @@
+import io
+import os
+
+from crank.core.set import Set
+from crank.core.workout import LazyWorkout, Workout
+from crank.core.workouts import Workouts
+
+
+parent = os.path.dirname(os.path.abspath(__file__))
+TEST_WKT_FILE = os.path.join(parent, 'fixtures', 'squat.wkt')
+# The same session logged twice, like the pairs in crank.wkt
+PAIR = ['''2016 Apr 12 @ 1536
+- Old
+Deadlift: 68 x 5, 85 x 5, 102 x 3, 119 x 3, 136 x 3, 153 x 4
+- week: 2''', '''2016 Apr 12 @ 1536
+- version: 2
+Deadlift:
+- week: 2
+  1) 68 x 5
+  2) 85 x 5
+  3) 102 x 3
+  4) 119 x 3
+  5) 136 x 3
+  6) 153 x 4''']
+
+
+def test_fingerprint():
+    w = next(iter(Workouts.parse_wkt_file(TEST_WKT_FILE)))
+    fingerprint = w.fingerprint()
+    assert fingerprint == Workout.from_json(w.to_json()).fingerprint()
+    assert fingerprint == LazyWorkout(w.to_json()).fingerprint()
+    w.tags['week'] = '4'
+    assert w.fingerprint() != fingerprint
+
+
+def test_fingerprint_legacy_json():
+    """Stored JSON from before Sets were saved as runs, without tags."""
+    w = Workout.parse_wkt(PAIR[1])
+    legacy = {'timestamp': w.timestamp.isoformat(), 'exercises': [
+        {'name': 'Deadlift', 'tags': {'week': '2'},
+         'sets': [{'work': 100, 'reps': 5, 'order': o} for o in (1, 2, 3)]}]}
+    w.exercises[0].sets = [Set(100, 5, order=o) for o in (1, 2, 3)]
+    w.tags = {}
+    lazy = LazyWorkout(legacy)
+    assert lazy.fingerprint() == w.fingerprint()
+    assert not lazy.materialized
+    assert Workout.from_json(legacy).fingerprint() == w.fingerprint()
+
+
+def test_merge():
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    total = wkts.length
+    # The same log again, plus both copies of a new session
+    incoming = list(Workouts.iter_wkt_file(TEST_WKT_FILE))
+    incoming.extend(Workout.parse_wkt(block) for block in PAIR)
+    report = wkts.merge(incoming)
+    assert len(report.identical) == total
+    assert len(report.new) == 1
+    (held, w), = report.conflicts
+    assert held.tags == {'comment': 'Old'}
+    assert w.tags == {'version': '2'}
+    assert wkts.length == total + 1
+    # The first copy is kept
+    assert held in wkts.workouts
+    assert [x for x in wkts if x == held][0].tags == {'comment': 'Old'}
+
+    out = io.StringIO()
+    report.write(out)
+    text = out.getvalue()
+    assert text.startswith('1 new, {:d} identical, 1 conflicting'
+                           .format(total))
+    assert 'version: 2' in text
+
+
+def test_merge_replace():
+    wkts = Workouts()
+    wkts.merge([Workout.parse_wkt(PAIR[0])])
+    report = wkts.merge([Workout.parse_wkt(PAIR[1])], replace=True)
+    assert len(report.conflicts) == 1
+    w, = wkts
+    assert w.tags == {'version': '2'}
+    assert len(wkts.exercise_history('deadlift')[0][1].sets) == 6
@@ -0,0 +1,77 @@
+import io
+import os
+
+import numpy as np
+
+from crank.core.recovery import (Recovery, max_slopes, recover_all,
+                                 recover_sets, recover_workouts,
+                                 work_rep_sims)
+from crank.core.set import Set
+from crank.core.set_v1 import max_slope, work_rep_sim
+from crank.core.workouts import Workouts
+
+
+parent = os.path.dirname(os.path.abspath(__file__))
+TEST_WKT_FILE = os.path.join(parent, 'fixtures', 'squat.wkt')
+
+
+def test_max_slopes():
+    rows = [[5, 7, 70, 80, 90], [12, 13, 23, 22], [1, 2]]
+    idx, confidence = max_slopes(rows)
+    assert list(idx) == [max_slope(r)[0] for r in rows]
+    assert confidence[0] > 0.5
+    assert np.all((confidence >= 0) & (confidence <= 1))
+
+
+def test_work_rep_sims():
+    work = [100, 20, 100]
+    rows = [[5, 7, 70, 80, 90], [12, 14, 16, 18], [5, 60, 200, 210]]
+    idx = work_rep_sims(work, rows)
+    assert list(idx) == [work_rep_sim(w, r)[0] for w, r in zip(work, rows)]
+    assert list(work_rep_sims([100], [[5, 6, 7]])) == [3]
+
+
+def test_recover_sets():
+    recs = recover_sets([
+        '100 x 5, 7, 70, 80,90 x 6',
+        '95,115,130,150x5,170x5/3/2, 185x5',
+        '60 x 8, 6, 4',
+        '20 x 12, 14, 16, 18 x 5',
+        '15 x 35|30',
+        # A clear jump at 200, but 60 is already nearer 100 than 5
+        '100 x 5, 60, 200, 210 x 3',
+    ])
+    assert [r.status for r in recs] == [
+        Recovery.RECOVERED, Recovery.RECOVERED, Recovery.RECOVERED,
+        Recovery.AMBIGUOUS, Recovery.FAILED, Recovery.AMBIGUOUS]
+    assert recs[0].sets == [Set(100, 5), Set(100, 7), Set(70, 6),
+                            Set(80, 6), Set(90, 6)]
+    assert recs[2].sets == [Set(60, 8), Set(60, 6), Set(60, 4)]
+    assert recs[4].reason
+
+
+def test_recover_all_pool():
+    raws = ['100 x 5, 7, 70, 80,90 x 6', '60 x 8, 6, 4', 'nope'] * 5
+    serial = recover_all(raws)
+    pooled = recover_all(raws, processes=2, chunksize=4)
+    assert [(r.status, r.sets) for r in pooled] == \
+        [(r.status, r.sets) for r in serial]
+
+
+def test_recover_workouts():
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    wkts.journaled = True
+    report = recover_workouts(wkts)
+    assert report.recovered and report.pending
+    assert len(wkts.changes) == len({w for w, _, _ in report.recovered})
+    for w, ex, rec in report.recovered:
+        assert not ex.raw_sets and ex.sets == rec.sets
+    for w, ex, rec in report.pending:
+        assert ex.raw_sets == rec.raw
+
+    out = io.StringIO()
+    report.write(out)
+    assert out.getvalue().startswith(
+        'Recovered {:d} of {:d}'.format(len(report.recovered),
+                                        len(report.entries)))
+    assert 'Needs review' in out.getvalue()
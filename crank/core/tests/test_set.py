@@ -1,7 +1,12 @@
+import random
 from collections import namedtuple
 
-from crank.core.set import (Set, parse_ordering, parse_set_body,
-                            group_sets_by_order)
+import pytest
+
+from benchmarks.set_parse import legacy_parse
+from crank.core.set import (Set, SetArray, SetRun, parse_ordering,
+                            parse_set_body, group_sets_by_order, lex_ordering,
+                            lex_set_body, set_runs)
 
 
 def test_parsing_set_lines():
@@ -41,6 +46,14 @@ def test_parsing_set_lines():
             assert ret == c.output
 
 
+def test_parsing_sets_stops_at_next_exercise():
+    lines = ['  1-3) 100 x 5', '  4) 110 x 3', 'Bench:', '  5) 60 x 8']
+    ret, rem = Set.parse_sets(lines)
+    assert ret == [Set(work=100, reps=5, order=o) for o in (1, 2, 3)] + \
+        [Set(work=110, reps=3, order=4)]
+    assert rem == lines[2:]
+
+
 def test_parsing_set_string():
     SetTestCase = namedtuple('SetTestCase', ['string', 'output'])
     cases = [
@@ -90,6 +103,26 @@ def test_order_parsing():
         assert parse_ordering(tc.string) == tc.output
 
 
+def test_lex_ordering():
+    SetTestCase = namedtuple('SetTestCase', ['string', 'output'])
+    cases = [
+        SetTestCase('1) 8', ([(1, 1)], 3)),
+        SetTestCase(', 1,3-4 ,) 8', ([(1, 1), (3, 2)], 11)),
+        # Ranges aren't expanded
+        SetTestCase('1-10000000000) 8', ([(1, 10000000000)], 15)),
+    ]
+    for tc in cases:
+        assert lex_ordering(tc.string) == tc.output
+    for bad in ('1,,2) 8', '1 2) 8', '1 - 2) 8', '100 x 8', '5-3) 8'):
+        with pytest.raises(ValueError):
+            lex_ordering(bad)
+
+
+def test_lex_set_body():
+    assert lex_set_body('1,2) [30] 100 x 8, 5', 5) == [(100, 8, 30),
+                                                       (0, 5, 0)]
+
+
 def test_set_body_parsing():
     SetTestCase = namedtuple('SetTestCase', ['string', 'output'])
     cases = [
@@ -124,3 +157,124 @@ def test_group_by_order():
     ]
     for c in cases:
         assert group_sets_by_order(c.sets) == c.output
+
+
+def test_set_array():
+    sets = [Set(work=100, reps=8, order=1),
+            Set(work=110, reps=7, rest=60, order=2)]
+    arr = SetArray(sets)
+    assert len(arr) == 2
+    assert arr == sets
+    assert list(arr) == sets
+    assert arr[-1] == sets[-1]
+    assert arr.column('work') == SetArray.from_json(arr.to_json()).column(
+        'work')
+    arr.insert(0, Set(reps=5))
+    arr[1] = Set(work=105, reps=8, order=1)
+    del arr[-1]
+    assert arr == [Set(reps=5), Set(work=105, reps=8, order=1)]
+    with pytest.raises(IndexError):
+        arr[2]
+
+
+def test_set_runs():
+    runs = Set.parse_runs('1-50, 52) [30] 100 x 5')
+    assert runs == [SetRun(100, 5, 30, order=1, count=50),
+                    SetRun(100, 5, 30, order=52)]
+    assert len(runs[0]) == 50
+    assert list(runs[0])[-1] == Set(100, 5, 30, order=50)
+    assert runs[0].label == '1-50'
+
+    arr = SetArray(runs)
+    assert len(arr) == 51
+    assert arr[49] == Set(100, 5, 30, order=50)
+    assert arr.column('order')[-2:].tolist() == [50, 52]
+    # Orders 50 and 52 don't follow on, so they stay separate runs
+    assert arr.runs() == runs
+    assert arr.to_json() == [
+        {'work': 100, 'reps': 5, 'rest': 30, 'order': 1, 'count': 50},
+        {'work': 100, 'reps': 5, 'rest': 30, 'order': 52}]
+    assert SetArray.from_json(arr.to_json()) == arr
+
+
+def test_unordered_set_runs():
+    sets = [Set(100, 3), Set(100, 3), Set(100, 3), Set(110, 1)]
+    runs = set_runs(sets)
+    assert runs == [SetRun(100, 3, count=3), SetRun(110, 1)]
+    assert list(runs[0]) == sets[:3]
+    assert SetArray(runs) == sets
+
+
+def test_zero_based_set_runs():
+    sets = Set.parse('0-2) 100 x 5')
+    assert [s.order for s in sets] == [0, 1, 2]
+    run, = Set.parse_runs('0-2) 100 x 5')
+    assert run.label == '0-2'
+    arr = SetArray([run])
+    assert arr.column('order').tolist() == [0, 1, 2]
+    assert arr.runs() == [run]
+    assert arr.to_json() == [
+        {'work': 100, 'reps': 5, 'order': 0, 'count': 3}]
+    assert SetArray.from_json(arr.to_json()) == sets
+    # Unordered Sets after an order 0 stay unordered
+    unordered = [Set(100, 5), Set(100, 5), Set(100, 5, order=1)]
+    runs = set_runs(unordered)
+    assert runs == [SetRun(100, 5, count=2), SetRun(100, 5, order=1)]
+    assert [s for run in runs for s in run] == unordered
+
+
+def baseline_outcome(parse, string):
+    try:
+        return parse(string)
+    except ValueError:
+        return ValueError
+
+
+def test_lexer_matches_baseline():
+    for string in ('1) 8', '  1) 114 x 8', '1) [30] 114 x 8',
+                   '1,2) [30] 114 x 8', '  4-6) [30] 114 x 8',
+                   '2,3) 100 x 8, [60] 110 x 7',
+                   '1-3, 5-7) 100 x 8, [60] 110 x 7',
+                   '1-3) 100x8, 110x7, 120x 6', '1 , 3) 8', '1-4)    8',
+                   '1,3-5, 7)8', '  1-50) [30] 100 x 5', ', 1,3-4 ,) 8',
+                   '10,13) 18', '  9,12,15) [120] 5', '0-2) 100 x 5'):
+        assert Set.parse(string) == legacy_parse(string), string
+    # Random prefixes, outside the differences below
+    rng = random.Random(0)
+    for _ in range(2000):
+        string = ''
+        for _ in range(rng.randint(1, 6)):
+            start = rng.randint(0, 20)
+            if rng.random() < 0.4:
+                string += '{}-{}'.format(start, start + rng.randint(0, 5))
+                string += rng.choice([',', ' , ', ')'])
+            else:
+                string += rng.choice([str(start), ''])
+                string += rng.choice([',', ' ', ' , ', ')'])
+        string += rng.choice([' 100 x 5', ' 8, 9', ' [30] 1, 2, 3', ''])
+        assert baseline_outcome(Set.parse, string) == \
+            baseline_outcome(legacy_parse, string), string
+
+
+def test_lexer_baseline_differences():
+    """Prefixes the lexer deliberately reads differently to the baseline."""
+    for string, baseline in (
+            # Negative orders
+            ('-3) 8', [Set(reps=8, order=-3)]),
+            ('1,-3) 8', [Set(reps=8, order=1), Set(reps=8, order=-3)]),
+            # Reversed ranges, which held no Sets
+            ('5-3) 8', []),
+            # Anything after a range, up to the next comma
+            ('1-3-5) 8', [Set(reps=8, order=o) for o in (1, 2, 3)]),
+            ('1-2 7) 8', [Set(reps=8, order=o) for o in (1, 2)])):
+        assert legacy_parse(string) == baseline
+        with pytest.raises(ValueError):
+            Set.parse(string)
+    # Whitespace other than spaces before the closing parenthesis
+    for string in ('1,\t) 8', '1\t,\t) 8'):
+        with pytest.raises(ValueError):
+            legacy_parse(string)
+        assert Set.parse(string) == [Set(reps=8, order=1)]
+    # Ranges are checked before they're expanded
+    with pytest.raises(ValueError):
+        Set.parse('12-10031002100,2')
@@ -0,0 +1,61 @@
+import os
+from datetime import datetime
+
+from crank.core.sqlite import SQLiteWorkouts
+from crank.core.workouts import Workouts
+
+
+parent = os.path.dirname(os.path.abspath(__file__))
+TEST_WKT_FILE = os.path.join(parent, 'fixtures', 'squat.wkt')
+
+
+def test_sqlite_storage(tmpdir):
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    filename = str(tmpdir.join('workouts.db'))
+    db = SQLiteWorkouts.from_workouts(filename, wkts)
+    db.save()
+    db.close()
+
+    loaded = Workouts.load(filename)
+    assert isinstance(loaded, SQLiteWorkouts)
+    assert loaded.length == 43
+    assert [w.to_json() for w in loaded] == [w.to_json() for w in wkts]
+
+    first, last = loaded.workouts[0], loaded.workouts[-1]
+    last.tags['comment'] = 'Edited'
+    loaded.touch(last)
+    loaded.remove(first)
+    loaded.save()
+
+    opened = SQLiteWorkouts.open(filename)
+    assert opened.length == opened.count() == 42
+    assert [w.to_json() for w in opened] == \
+        [w.to_json() for w in Workouts.load(filename)]
+    edited, = opened.select_tag('comment', 'Edited')
+    assert edited.timestamp == last.timestamp
+
+    # Workouts from a query can be removed without loading the rest
+    opened.remove(edited)
+    assert opened.length == 41
+    assert edited not in list(opened)
+    opened.save()
+    assert opened.count() == 41
+    assert SQLiteWorkouts.open(filename).length == 41
+
+
+def test_sqlite_queries(tmpdir):
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    db = SQLiteWorkouts.from_workouts(str(tmpdir.join('workouts.db')), wkts)
+    db.save()
+
+    start, end = datetime(2015, 3, 1), datetime(2015, 6, 1)
+    expected = [w.to_json() for w in wkts
+                if start <= w.timestamp < end]
+    assert expected
+    assert [w.to_json() for w in db.select_between(start, end)] == expected
+
+    squats = db.select_exercise('SQUAT')
+    assert squats
+    assert all(any(ex.name.lower() == 'squat' for ex in w.exercises)
+               for w in squats)
+    assert db.select_exercise('No such lift') == []
@@ -13,3 +13,14 @@ def test_tag_parsing():
     obs, remainder = tags.parse_tags(TEST_TAGS)
     assert exp == obs
     assert remainder == TEST_TAGS[2:]
+
+
+def test_tags_interned():
+    # Built at runtime, so the compiler can't have shared the constants
+    unit, kgs = ''.join(['un', 'it']), ''.join(['kg', 's'])
+    first, _ = tags.parse_tags(['- unit: kgs'])
+    second = tags.intern_tags({unit: kgs, 'comment': 'Tired'})
+    (k1, v1), = first.items()
+    k2, v2 = next(iter(second.items()))
+    assert k1 is k2 and v1 is v2
+    assert second['comment'] == 'Tired'
@@ -0,0 +1,90 @@
+import os
+import shutil
+from datetime import datetime
+
+import pytest
+
+from crank.core.workout import Workout
+from crank.core.wkt_index import WktIndex
+from crank.util import stream
+
+
+parent = os.path.dirname(os.path.abspath(__file__))
+TEST_WKT_FILE = os.path.join(parent, 'fixtures', 'squat.wkt')
+
+
+def test_wkt_index(tmpdir):
+    filename = str(tmpdir.join('squat.wkt'))
+    shutil.copy(TEST_WKT_FILE, filename)
+    wkts = [Workout.parse_wkt(b) for b in
+            stream.buffer_data(stream.stream_file(filename))]
+
+    idx = WktIndex.open(filename)
+    assert os.path.exists(idx.index_file)
+    assert len(idx) == len(wkts)
+    assert WktIndex.open(filename).blocks == idx.blocks
+
+    start, end = datetime(2015, 9, 1), datetime(2015, 10, 1)
+    exp = sorted(w.timestamp for w in wkts
+                 if isinstance(w.timestamp, datetime) and
+                 start <= w.timestamp < end)
+    obs = [w.timestamp for w in idx.between(start, end)]
+    assert obs and obs == exp
+    assert len(list(idx.since(start))) >= len(exp)
+
+
+def test_stale_wkt_index(tmpdir):
+    wkt = tmpdir.join('log.wkt')
+    wkt.write('2016 Apr 12 @ 1536\nSquat: 100 x 5\n')
+    idx = WktIndex.open(str(wkt))
+    assert len(idx) == 1
+    wkt.write('\n2016 Apr 14 @ 1315\nSquat: 105 x 5\n', mode='a')
+    os.utime(str(wkt), (0, 0))
+    assert not idx.is_current()
+    idx = WktIndex.open(str(wkt))
+    assert [w.timestamp for w in idx.since('2016 Apr 13 @ 0000')] == \
+        [datetime(2016, 4, 14, 13, 15)]
+
+
+def test_wkt_index_mtime_ns(tmpdir):
+    wkt = tmpdir.join('log.wkt')
+    wkt.write('2016 Apr 12 @ 1536\nSquat: 100 x 5\n')
+    mtime_ns = os.stat(str(wkt)).st_mtime_ns
+    idx = WktIndex.open(str(wkt))
+    # Same size, rewritten within the same float-rounded second
+    wkt.write('2016 Apr 12 @ 1536\nSquat: 105 x 5\n')
+    os.utime(str(wkt), ns=(mtime_ns, mtime_ns + 100))
+    assert not idx.is_current()
+    # Sidecars from before mtimes were kept in nanoseconds are rebuilt
+    with open(idx.index_file, 'w') as fp:
+        fp.write('{"blocks": [], "unparsed": [], "size": 0, "mtime": 0}')
+    assert WktIndex.load(str(wkt)) is None
+    assert len(WktIndex.open(str(wkt))) == 1
+
+
+def test_wkt_index_refreshes(tmpdir):
+    wkt = tmpdir.join('log.wkt')
+    wkt.write('2016 Apr 14 @ 1315\nSquat: 105 x 5\n')
+    idx = WktIndex.open(str(wkt))
+    # Edit the file under an index that is still held, and one just loaded
+    wkt.write('2016 Apr 12 @ 1536\nBench: 60 x 5\n\n'
+              '2016 Apr 14 @ 1315\nSquat: 110 x 5\n')
+    os.utime(str(wkt), (0, 0))
+    loaded = WktIndex.load(str(wkt))
+    for i in (loaded, idx):
+        assert [w.timestamp for w in i.between()] == \
+            [datetime(2016, 4, 12, 15, 36), datetime(2016, 4, 14, 13, 15)]
+        assert len(i) == 2 and i.is_current()
+        [w] = i.since('2016 Apr 13 @ 0000')
+        assert w.exercises[0].sets[0].work == 110
+    assert WktIndex.load(str(wkt)).blocks == idx.blocks
+
+
+def test_wkt_index_changed_while_reading(tmpdir):
+    wkt = tmpdir.join('log.wkt')
+    wkt.write('2016 Apr 12 @ 1536\nSquat: 100 x 5\n')
+    wkts = WktIndex.open(str(wkt)).between()
+    wkt.write('2016 Apr 12 @ 1536\nSquat: 1 x 5\n')
+    os.utime(str(wkt), (0, 0))
+    with pytest.raises(ValueError):
+        next(wkts)
@@ -1,6 +1,12 @@
+import io
 import json
 import os
+from datetime import datetime
 
+import pytest
+
+from crank.core.exercise import Exercise
+from crank.core.workout import LazyWorkout, Workout
 from crank.core.workouts import (Workouts, WorkoutsJSONEncoder,
                                  WorkoutsJSONDecoder)
 
@@ -32,3 +38,208 @@ def test_workouts_encoding():
     wkts2 = json.loads(wkts_json, cls=WorkoutsJSONDecoder)
     assert wkts.filename == wkts2.filename
     assert wkts.workouts == wkts2.workouts
+
+
+def test_iter_wkt_file():
+    wkts = Workouts.iter_wkt_file(TEST_WKT_FILE)
+    assert not isinstance(wkts, (list, Workouts))
+    parsed = list(wkts)
+    assert len(parsed) == 43
+    assert all(isinstance(w, Workout) for w in parsed)
+
+
+def test_parallel_parse_wkt_file():
+    serial = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    parallel = Workouts.parse_wkt_file(TEST_WKT_FILE, processes=2)
+    assert len(parallel.workouts) == 43
+    assert [w.to_json() for w in parallel.workouts] == \
+        [w.to_json() for w in serial.workouts]
+
+
+def test_binary_storage(tmpdir):
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    wkts.filename = str(tmpdir.join('workouts.bin'))
+    wkts.save(fmt=Workouts.BINARY)
+
+    wkts2 = Workouts.load(wkts.filename)
+    assert wkts2.fmt == Workouts.BINARY
+    assert wkts2.filename == wkts.filename
+    assert [w.to_json() for w in wkts2.workouts] == \
+        [w.to_json() for w in wkts.workouts]
+    # Saving again keeps the format it was loaded in
+    wkts2.save()
+    assert Workouts.load(wkts.filename).fmt == Workouts.BINARY
+
+
+def test_journaled_storage(tmpdir):
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    wkts.filename = str(tmpdir.join('workouts.json'))
+    wkts.journaled = True
+    wkts.save()  # No snapshot yet, so it's written in full
+    journal_file = wkts.filename + '.journal'
+    assert not os.path.exists(journal_file)
+
+    first, last = wkts.workouts[0], wkts.workouts[-1]
+    last.tags['comment'] = 'Edited'
+    wkts.touch(last)
+    wkts.remove(first)
+    size = os.path.getsize(wkts.filename)
+    wkts.save()
+    assert os.path.getsize(wkts.filename) == size
+    with open(journal_file) as fp:
+        assert len(fp.readlines()) == 2
+
+    wkts2 = Workouts.load(wkts.filename)
+    assert wkts2.journaled
+    assert wkts2.length == 42
+    assert wkts2.workouts[-1].tags['comment'] == 'Edited'
+
+    wkts2.compact()
+    assert not os.path.exists(journal_file)
+    assert Workouts.load(wkts.filename).length == 42
+
+    # A parsed collection pointed at someone else's snapshot overwrites it,
+    # rather than journaling its (empty) changes on top
+    with open(wkts.filename, 'w') as fp:
+        fp.write('{"workouts": []}')
+    wkts3 = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    wkts3.filename = wkts.filename
+    wkts3.journaled = True
+    wkts3.save()
+    assert not os.path.exists(journal_file)
+    assert Workouts.load(wkts.filename).length == 43
+
+
+def test_torn_journal(tmpdir):
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    wkts.filename = str(tmpdir.join('workouts.json'))
+    wkts.journaled = True
+    wkts.save()
+    wkts.remove(wkts.workouts[0])
+    wkts.save()
+    journal_file = wkts.filename + '.journal'
+    # A crash partway through appending the next record
+    with open(journal_file, 'a') as fp:
+        fp.write('{"op": "del", "timest')
+
+    wkts2 = Workouts.load(wkts.filename)
+    assert wkts2.length == 42
+    with open(journal_file) as fp:
+        assert len(fp.readlines()) == 1
+    wkts2.remove(wkts2.workouts[0])
+    wkts2.save()
+    assert Workouts.load(wkts.filename).length == 41
+
+    # Anything but the last record being unreadable is corruption
+    with open(journal_file, 'a') as fp:
+        fp.write('{"op": "del", "timest\n{"op": "del"}\n')
+    with pytest.raises(ValueError):
+        Workouts.load(wkts.filename)
+
+
+def test_range_queries():
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    unparsed = Workout('Some day')
+    wkts.add(unparsed)
+    assert wkts.unparsed == [unparsed]
+
+    start, end = datetime(2015, 3, 1), datetime(2015, 6, 1)
+    expected = [w for w in wkts.workouts[1:] if start <= w.timestamp < end]
+    assert expected
+    assert list(wkts.between(start, end)) == expected
+    assert list(wkts.since(datetime(2016, 1, 1))) == []
+    assert list(wkts.between(end, start)) == []
+    assert list(wkts.since(start))[:len(expected)] == expected
+
+    latest = list(wkts.latest(3))
+    assert latest == list(reversed(wkts.workouts[-3:]))
+    assert len(list(wkts.latest(100))) == 43
+
+    newer = Workout(datetime(2016, 1, 1))
+    wkts.add(newer)
+    assert next(wkts.latest()) is newer
+
+
+def test_exercise_history():
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    expected = [(w, ex) for w in wkts.workouts for ex in w.exercises
+                if ex.name.lower() == 'squat']
+    history = wkts.exercise_history(' SQUAT ')
+    assert history and len(history) == len(expected)
+    assert all(a[0] is b[0] and a[1] is b[1]
+               for a, b in zip(history, expected))
+    assert wkts.exercise_history('No such lift') == []
+
+    # The index follows changes
+    first = wkts.workouts[0]
+    wkts.remove(first)
+    assert all(w is not first for w, _ in wkts.exercise_history('squat'))
+    w = Workout(datetime(2016, 1, 1),
+                exercises=[Exercise('Zercher squat')])
+    wkts.add(w)
+    assert wkts.exercise_history('zercher  Squat')[0][0] is w
+    w.exercises[0].name = 'Hack squat'
+    wkts.touch(w)
+    assert 'zercher squat' not in wkts.exercise_index
+    assert wkts.exercise_history('hack squat')[0][0] is w
+
+
+def test_filter():
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    expected = [w for w in wkts.workouts
+                if w.tags.get('Training max') == '300']
+    assert expected
+    assert wkts.filter('training max == 300') == expected
+    assert all(ex.tags.get('unit') == 'kg'
+               for _, ex in wkts.filter_exercises({'unit': 'kg'}))
+
+    w = Workout(datetime(2016, 1, 1), tags={'Training max': '300'})
+    wkts.add(w)
+    assert wkts.filter({'Training max': 300})[-1] is w
+
+
+def test_lazy_load(tmpdir):
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    wkts.filename = str(tmpdir.join('workouts.json'))
+    wkts.save()
+
+    lazy = Workouts.load(wkts.filename, lazy=True)
+    assert all(isinstance(w, LazyWorkout) and not w.materialized
+               for w in lazy.workouts)
+    assert list(lazy.workouts) == list(wkts.workouts)
+    assert list(lazy.since(datetime(2015, 10, 1)))
+    # Saving doesn't need to decode anything
+    assert [w.to_json() for w in lazy.workouts] == \
+        [w.to_json() for w in wkts.workouts]
+    assert not any(w.materialized for w in lazy.workouts)
+
+    w = lazy.workouts[-1]
+    assert w.exercises == wkts.workouts[-1].exercises
+    assert w.materialized
+
+    # Compact JSON, and keys in any order
+    d = wkts.to_json()
+    for text in (json.dumps({'workouts': d['workouts'], 'x': [1, {}]}),
+                 json.dumps(d, separators=(',', ':'))):
+        with open(wkts.filename, 'w') as fp:
+            fp.write(text)
+        lazy = Workouts.load(wkts.filename, lazy=True)
+        assert [w.to_json() for w in lazy] == d['workouts']
+    with open(wkts.filename, 'w') as fp:
+        fp.write('{"workouts": [{"timestamp": "2016-01-01"} {}]}')
+    with pytest.raises(ValueError):
+        Workouts.load(wkts.filename, lazy=True)
+
+
+@pytest.mark.parametrize('indent', [2, None])
+def test_dump_json(indent):
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    for ws in (wkts, Workouts()):
+        sio = io.StringIO()
+        ws.dump_json(sio, indent)
+        streamed = sio.getvalue()
+        d = json.loads(streamed)
+        separators = (',', ':') if indent is None else None
+        assert streamed == json.dumps(d, indent=indent,
+                                      separators=separators)
+        assert d['workouts'] == ws.to_json()['workouts']
@@ -0,0 +1,163 @@
+import bisect
+import json
+import mmap
+import os
+from datetime import datetime
+
+from crank.core.workout import Workout
+from crank.util import stream
+from crank.util.logging import logger
+from crank.util.time import parse_timestamp
+
+
+class WktIndex:
+    """Sidecar index of the blocks in a .wkt file.
+
+    Maps each block's timestamp to its byte range, so time-range lookups only
+    decode and parse the blocks they return. The index is persisted next to
+    the .wkt file and rebuilt whenever the file's size or nanosecond mtime
+    changes; lookups on an index held across a change rebuild it first.
+    """
+    suffix = '.idx'
+
+    def __init__(self, filename, blocks=(), unparsed=(), size=0,
+                 mtime_ns=0):
+        """Initialize from pre-computed block offsets.
+
+        :arg str filename: Path of the indexed .wkt file.
+        :kwarg blocks: ``[timestamp, start, end]`` entries, sorted by their
+            ISO-8601 timestamp.
+        :kwarg unparsed: ``[header, start, end]`` entries for blocks whose
+            timestamp couldn't be parsed.
+        """
+        self.filename = filename
+        self.blocks = [tuple(b) for b in blocks]
+        self.keys = [b[0] for b in self.blocks]
+        self.unparsed = [tuple(b) for b in unparsed]
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @property
+    def index_file(self):
+        return self.filename + self.suffix
+
+    @classmethod
+    def build(cls, filename):
+        """Index a .wkt file by scanning it for block boundaries."""
+        st = os.stat(filename)
+        blocks, unparsed = [], []
+        with open(filename, 'rb') as fp, _mmap(fp, st.st_size) as mm:
+            for start, end in stream.mmap_blocks(mm):
+                eol = mm.find(b'\n', start, end)
+                header = mm[start:end if eol == -1 else eol].decode().strip()
+                try:
+                    ts = parse_timestamp(header)
+                    blocks.append((ts.isoformat(), start, end))
+                except Exception:
+                    unparsed.append((header, start, end))
+        blocks.sort()
+        return cls(filename, blocks, unparsed, st.st_size, st.st_mtime_ns)
+
+    @classmethod
+    def open(cls, filename):
+        """Load the sidecar index for a .wkt file, rebuilding it if stale."""
+        idx = cls.load(filename)
+        if idx is None or not idx.is_current():
+            logger.debug('indexing %s', filename)
+            idx = cls.build(filename)
+            idx.save()
+        return idx
+
+    @classmethod
+    def load(cls, filename):
+        """Load the sidecar index for a .wkt file, if one exists."""
+        try:
+            with open(filename + cls.suffix) as fp:
+                d = json.load(fp)
+            return cls(filename, **d)
+        except (OSError, TypeError, ValueError):
+            return None
+
+    def save(self):
+        with open(self.index_file, 'w') as fp:
+            json.dump(self.to_json(), fp)
+
+    def is_current(self):
+        """Whether the .wkt file is unchanged since it was indexed."""
+        try:
+            st = os.stat(self.filename)
+        except OSError:
+            return False
+        return st.st_size == self.size and st.st_mtime_ns == self.mtime_ns
+
+    def refresh(self):
+        """Rebuild the index, and its sidecar, if the .wkt file changed."""
+        if self.is_current():
+            return
+        logger.debug('reindexing %s', self.filename)
+        idx = self.build(self.filename)
+        self.blocks, self.keys = idx.blocks, idx.keys
+        self.unparsed = idx.unparsed
+        self.size, self.mtime_ns = idx.size, idx.mtime_ns
+        self.save()
+
+    def to_json(self):
+        return {
+            'blocks': self.blocks,
+            'unparsed': self.unparsed,
+            'size': self.size,
+            'mtime_ns': self.mtime_ns
+        }
+
+    def between(self, start=None, end=None):
+        """Yield Workouts with ``start <= timestamp < end``, in order.
+
+        Either bound may be omitted. Blocks with unparseable timestamps are
+        never included; see :meth:`parse_unparsed`.
+        """
+        self.refresh()
+        lo = 0 if start is None else bisect.bisect_left(self.keys,
+                                                        _key(start))
+        hi = (len(self.keys) if end is None else
+              bisect.bisect_left(self.keys, _key(end)))
+        return self._parse(self.blocks[lo:hi])
+
+    def since(self, start):
+        """Yield Workouts at or after ``start``."""
+        return self.between(start)
+
+    def parse_unparsed(self):
+        """Yield the Workouts whose timestamps couldn't be indexed."""
+        self.refresh()
+        return self._parse(self.unparsed)
+
+    def _parse(self, entries):
+        if not entries:
+            return
+        with open(self.filename, 'rb') as fp:
+            # The file may have changed again since the lookup
+            st = os.fstat(fp.fileno())
+            if (st.st_size, st.st_mtime_ns) != (self.size, self.mtime_ns):
+                raise ValueError(self.filename + ' changed while reading it')
+            with _mmap(fp, self.size) as mm:
+                for _, start, end in entries:
+                    lines = mm[start:end].decode().splitlines()
+                    for wkt_block in stream.buffer_data(lines):
+                        yield Workout.parse_wkt(wkt_block)
+
+    def __len__(self):
+        return len(self.blocks) + len(self.unparsed)
+
+
+def _key(ts):
+    """Convert a datetime (or timestamp string) to an index key."""
+    if not isinstance(ts, datetime):
+        ts = parse_timestamp(ts)
+    return ts.isoformat()
+
+
+def _mmap(fp, size):
+    # mmap can't map an empty file
+    if not size:
+        return memoryview(b'')
+    return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
@@ -1,15 +1,16 @@
 from collections.abc import Iterable, Mapping
 from datetime import datetime
-from pprint import pformat
 
 from crank.core.exercise import Exercise
 from crank.util.cli import read_until_valid
-from crank.util.logging import logger
+from crank.util import trace
+from crank.util.logging import Pretty, logger
 from crank.util.time import parse_timestamp
-from crank.core.tags import parse_tags
+from crank.core.tags import intern_tags, parse_tags
 
 
 class Workout:
+    __slots__ = ('timestamp', 'tags', 'exercises')
 
     def __init__(self,
                  timestamp,
@@ -31,22 +32,25 @@ class Workout:
     @classmethod
     def parse_wkt(cls, wkt_data):
         """Create a Workout instance from a .wkt format string or iterable."""
-        logger.debug("Parsing Workout:\n%s", pformat(wkt_data))
+        logger.debug("Parsing Workout:\n%s", Pretty(wkt_data))
         if isinstance(wkt_data, str):
             wkt_data = wkt_data.split('\n')
         assert isinstance(wkt_data, Iterable)
         if not wkt_data:
             raise ValueError("Empty value provided")
         # Timestamp
-        try:
-            timestamp = parse_timestamp(wkt_data[0])
-        except:  # Store the string for later re-parsing
-            timestamp = wkt_data[0]
+        with trace.stage('timestamp'):
+            try:
+                timestamp = parse_timestamp(wkt_data[0])
+            except:  # Store the string for later re-parsing
+                timestamp = wkt_data[0]
         # Tags
-        tags, wkt_data = parse_tags(wkt_data[1:])
+        with trace.stage('tags'):
+            tags, wkt_data = parse_tags(wkt_data[1:])
         # Exercises
         exercises = Exercise.parse_exercises(wkt_data)
-        return Workout(timestamp, tags=tags, exercises=exercises)
+        with trace.stage('construct'):
+            return Workout(timestamp, tags=tags, exercises=exercises)
 
     def upgrade(self):
         """Upgrade bootstraps the Exercise to a new schema.
@@ -71,9 +75,19 @@ class Workout:
             d['timestamp'] = self.timestamp
         return d
 
+    def fingerprint(self):
+        """Hash of the Workout's content: timestamp, tags and Exercises.
+
+        Equality and ``hash`` only look at the timestamp; two Workouts with
+        the same fingerprint are the same workout, down to the last rep.
+        """
+        return _fingerprint(self.to_json())
+
     @classmethod
     def from_json(cls, d):
         d_wkt = dict(d)
+        if d_wkt.get('tags'):
+            d_wkt['tags'] = intern_tags(d_wkt['tags'])
         d_wkt['exercises'] = [Exercise.from_json(ex) for ex in
                               d.get('exercises', [])]
         return cls(**d_wkt)
@@ -101,3 +115,81 @@ class Workout:
                 "exercises=[{}])").format(
                     str(self.timestamp),
                     ','.join((ex.name for ex in self.exercises)))
+
+
+class LazyWorkout(Workout):
+    """Workout whose Exercises are decoded from JSON on first access.
+
+    Only the timestamp and tags are kept decoded; the rest stays as the
+    Workout's JSON text, which takes a fraction of the memory of the decoded
+    objects. A collection can be listed, sorted and searched by date
+    without building any Exercises or Sets. Until then, :meth:`to_json`
+    hands back the original JSON.
+    """
+    __slots__ = ('_raw', '_exercises')
+
+    def __init__(self, d, raw=None):
+        """Initialize from a Workout's decoded JSON.
+
+        :kwarg str raw: ``d`` as JSON text, such as its slice of a file;
+            encoded from ``d`` if not given.
+        """
+        self._raw = None
+        tags = d.get('tags')
+        super().__init__(d.get('timestamp'),
+                         tags=intern_tags(tags) if tags else None)
+        if raw is None:
+            import json
+            raw = json.dumps(d, separators=(',', ':'))
+        self._raw = raw
+
+    @property
+    def materialized(self):
+        return self._raw is None
+
+    @property
+    def exercises(self):
+        if self._raw is not None:
+            self._exercises = [Exercise.from_json(ex) for ex in
+                               self._decode().get('exercises', [])]
+            self._raw = None
+        return self._exercises
+
+    @exercises.setter
+    def exercises(self, exercises):
+        self._raw = None
+        self._exercises = exercises
+
+    def fingerprint(self):
+        if self._raw is None:
+            return super().fingerprint()
+        # The stored JSON may predate the current layout, e.g. with Sets not
+        # collapsed into runs; hash what it decodes to instead
+        d = self.to_json()
+        return _fingerprint({
+            'timestamp': d['timestamp'],
+            'tags': d['tags'],
+            'exercises': [Exercise.from_json(ex).to_json()
+                          for ex in d.get('exercises', [])]})
+
+    def to_json(self):
+        if self._raw is None:
+            return super().to_json()
+        d = dict(self._decode(), tags=self.tags)
+        if isinstance(self.timestamp, datetime):
+            d['timestamp'] = self.timestamp.isoformat()
+        else:
+            d['timestamp'] = self.timestamp
+        return d
+
+    def _decode(self):
+        import json
+        return json.loads(self._raw)
+
+
+def _fingerprint(d):
+    """SHA-1 of a Workout's JSON, in canonical form."""
+    import hashlib
+    import json
+    canonical = json.dumps(d, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode()).hexdigest()
@@ -1,11 +1,13 @@
 import json
+import os
 from collections.abc import Iterable
 from datetime import datetime
 
-from blist import sortedset
-
-from crank.util import stream
-from crank.core.workout import Workout
+from crank.util import stream, trace
+from crank.core import binary, journal
+from crank.core.cache import ParseCache
+from crank.core.index import ExerciseIndex, TagIndex
+from crank.core.workout import LazyWorkout, Workout
 
 
 class Workouts:
@@ -14,19 +16,158 @@ class Workouts:
     Handles storage and search for individual workouts.
     """
     default_file = 'workouts.json'
+    # Storage formats
+    JSON, BINARY = 'json', 'binary'
+
+    # Journal records that trigger a compaction on save
+    compact_after = 1000
+    # Indent of saved JSON; None saves compact JSON
+    json_indent = 2
+
+    def __init__(self, filename=default_file, workouts=(), fmt=JSON,
+                 journaled=False):
+        """Initialize with configuration.
 
-    def __init__(self, filename=default_file, workouts=()):
-        """Initialize with configuration."""
+        :kwarg bool journaled: Save changes made through :meth:`add`,
+            :meth:`remove` and :meth:`touch` by appending them to a journal
+            next to the snapshot, rather than rewriting the whole file.
+        """
         self.filename = filename
-        self.workouts = sortedset(workouts)
+        self.workouts = _sortedset(workouts)
         self.modified = None
+        self.fmt = fmt
+        self.journaled = journaled
+        self.changes = []
+        self.journal_length = 0
+        # File holding the snapshot these Workouts were loaded from or last
+        # compacted into; a journal only makes sense on top of that
+        self._snapshot = None
+        self._exercise_index = None
+        self._tag_index = None
 
     @property
     def length(self):
         return len(self.workouts)
 
+    def __iter__(self):
+        return iter(self.workouts)
+
+    def add(self, workout):
+        """Add a Workout, replacing any with the same timestamp."""
+        self.workouts.discard(workout)
+        self.workouts.add(workout)
+        self._record(journal.PUT, workout)
+
+    def remove(self, workout):
+        """Remove the Workout with the same timestamp as ``workout``."""
+        self.workouts.remove(workout)
+        self._record(journal.DEL, workout)
+
+    def touch(self, workout):
+        """Mark a Workout as edited in place, so the next save records it."""
+        self._record(journal.PUT, workout)
+
+    def merge(self, incoming, replace=False):
+        """Merge Workouts, reporting timestamp collisions by content.
+
+        See :func:`crank.core.merge.merge`; returns a
+        :class:`crank.core.merge.MergeReport`.
+        """
+        from crank.core.merge import merge
+        return merge(self, incoming, replace)
+
+    def _record(self, op, workout):
+        for index in (self._exercise_index, self._tag_index):
+            if index is None:
+                continue
+            if op == journal.PUT:
+                index.add(workout)
+            else:
+                index.remove(workout)
+        if self.journaled:
+            self.changes.append((op, workout))
+
+    def _bisect(self, timestamp):
+        """Position of the first Workout at or after a datetime.
+
+        Unparsed (string) timestamps sort before every datetime, so
+        ``datetime.min`` finds the first parsed Workout.
+        """
+        return self.workouts.bisect_left(Workout(timestamp))
+
+    @property
+    def exercise_index(self):
+        """:class:`ExerciseIndex` of these Workouts.
+
+        Built on first use, then kept up to date by :meth:`add`,
+        :meth:`remove` and :meth:`touch`.
+        """
+        if self._exercise_index is None:
+            self._exercise_index = ExerciseIndex(self.workouts)
+        return self._exercise_index
+
+    def exercise_history(self, name):
+        """Return ``(Workout, Exercise)`` pairs for every time an exercise
+        was done, oldest first.
+
+        Names are matched case- and whitespace-insensitively; see
+        :func:`crank.core.exercise.normalize_name`.
+        """
+        return self.exercise_index.lookup(name)
+
+    @property
+    def tag_index(self):
+        """:class:`TagIndex` of these Workouts and their Exercises, kept up to
+        date like :attr:`exercise_index`."""
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self.workouts)
+        return self._tag_index
+
+    def filter(self, criteria):
+        """Return the Workouts whose tags match every criterion, in order.
+
+        ``criteria`` is a dict of tag key to value, where a value of None
+        matches any value, or an expression like ``'week == 2 and unit ==
+        kgs'``. Keys and values are compared case-insensitively, as strings.
+        """
+        return self.tag_index.filter_workouts(criteria)
+
+    def filter_exercises(self, criteria):
+        """Return ``(Workout, Exercise)`` pairs for the Exercises whose own
+        tags match every criterion, in order; see :meth:`filter`."""
+        return self.tag_index.filter_exercises(criteria)
+
+    def _slice(self, start, stop, step=1):
+        for i in range(start, stop, step):
+            yield self.workouts[i]
+
+    @property
+    def unparsed(self):
+        """Workouts whose timestamp is still an unparsed string."""
+        return list(self._slice(0, self._bisect(datetime.min)))
+
+    def between(self, start=None, end=None):
+        """Yield the Workouts with ``start <= timestamp < end``, in order.
+
+        Either bound may be None. Workouts with unparsed timestamps are never
+        included; see :attr:`unparsed`.
+        """
+        lo = self._bisect(datetime.min if start is None else start)
+        hi = len(self.workouts) if end is None else self._bisect(end)
+        return self._slice(lo, max(lo, hi))
+
+    def since(self, timestamp):
+        """Yield the Workouts from ``timestamp`` on, in order."""
+        return self.between(timestamp)
+
+    def latest(self, n=1):
+        """Yield the ``n`` most recent Workouts, newest first."""
+        first, stop = self._bisect(datetime.min), len(self.workouts)
+        return self._slice(stop - 1, max(first, stop - n) - 1, -1)
+
     def upgrade(self):
         """Upgrade workouts to a new syntax."""
+        self._exercise_index = self._tag_index = None
         for i, w in enumerate(self.workouts):
             if not isinstance(self.workouts[i], Workout):
                 self.workouts[i] = Workout.parse_wkt(w)
@@ -40,51 +181,294 @@ class Workouts:
             'written_at': str(datetime.utcnow())
         }
 
+    def to_columns(self, unit='kgs'):
+        """Flatten every Set into NumPy arrays for vectorized analytics.
+
+        See :func:`crank.core.columns.to_columns`.
+        """
+        from crank.core import columns
+        return columns.to_columns(self.workouts, unit)
+
     @classmethod
-    def from_json(cls, json_object):
-        """Create Workouts from a dict."""
+    def from_json(cls, json_object, lazy=False):
+        """Create Workouts from a dict.
+
+        :kwarg bool lazy: Build :class:`LazyWorkout` s, which decode their
+            Exercises on first access.
+        """
+        from_json = LazyWorkout if lazy else Workout.from_json
         return cls(**{
             'filename': json_object.get('filename'),
-            'workouts': sortedset([Workout.from_json(w) for w in
+            'workouts': _sortedset([from_json(w) for w in
                                    json_object.get('workouts', [])])
             })
 
-    def save(self):
-        with open(self.filename, 'w') as wf:
-            json.dump(self, wf, default=self.to_json, indent=2)
+    def save(self, fmt=None):
+        """Save Workouts to file.
+
+        Journaled Workouts append their changes since the last save to the
+        journal, compacting it once it passes :attr:`compact_after` records.
+        Otherwise, or if :attr:`filename` isn't the snapshot they were loaded
+        from or last compacted into, the snapshot is rewritten in full.
+
+        :kwarg str fmt: ``Workouts.JSON`` or ``Workouts.BINARY``. Defaults to
+            the format the Workouts were loaded from.
+        """
+        if (self.journaled and fmt in (None, self.fmt) and
+                self._snapshot == self.filename and
+                os.path.exists(self.filename)):
+            if self.changes:
+                journal.append(journal.journal_file(self.filename),
+                               self.changes)
+                self.journal_length += len(self.changes)
+                self.changes = []
+            if self.journal_length >= self.compact_after:
+                self.compact()
+            return
+        self.compact(fmt)
+
+    def dump_json(self, fp, indent=2):
+        """Write Workouts as JSON to a file object, one Workout at a time.
+
+        The output is the same as ``json.dump(self.to_json(), fp,
+        indent=indent)``, but only one Workout's JSON is held in memory at
+        once. ``indent=None`` writes compact JSON, without any whitespace.
+        """
+        if indent is None:
+            item_sep, key_sep = ',', ':'
+            nl1 = nl2 = end = ''
+        else:
+            item_sep, key_sep = ',', ': '
+            nl1, nl2 = ('\n' + ' ' * indent * depth for depth in (1, 2))
+            end = '\n'
+        encode = json.JSONEncoder(indent=indent,
+                                  separators=(item_sep, key_sep)).encode
+        fp.write('{' + nl1 + '"filename"' + key_sep + encode(self.filename) +
+                 item_sep + nl1 + '"workouts"' + key_sep + '[')
+        sep = nl2
+        for w in self.workouts:
+            fp.write(sep + encode(w.to_json()).replace('\n', nl2))
+            sep = item_sep + nl2
+        if self.workouts:
+            fp.write(nl1)
+        fp.write(']' + item_sep + nl1 + '"written_at"' + key_sep +
+                 encode(str(datetime.utcnow())) + end + '}')
+
+    def compact(self, fmt=None):
+        """Rewrite the snapshot with every change and clear the journal."""
+        fmt = fmt or self.fmt
+        if fmt == self.BINARY:
+            with open(self.filename, 'wb') as wf:
+                binary.dump(self.filename, self.workouts, wf)
+        elif fmt == self.JSON:
+            with open(self.filename, 'w') as wf:
+                self.dump_json(wf, self.json_indent)
+        else:
+            raise ValueError('Unknown Workouts format: ' + str(fmt))
+        self.fmt = fmt
+        self._snapshot = self.filename
+        journal.remove(journal.journal_file(self.filename))
+        self.changes = []
+        self.journal_length = 0
 
     @classmethod
-    def load(cls, filename=default_file):
-        """Load Workouts from file."""
-        with open(filename) as wf:
-            wkts = json.load(wf, cls=WorkoutsJSONDecoder)
+    def load(cls, filename=default_file, journaled=False, lazy=False):
+        """Load Workouts from file, detecting its format.
+
+        Any journal next to the file is replayed over the snapshot, in which
+        case the Workouts stay journaled. An SQLite database is loaded as
+        :class:`crank.core.sqlite.SQLiteWorkouts`.
+
+        :kwarg bool lazy: Load a JSON file as :class:`LazyWorkout` s, which
+            only decode their Exercises when they're used. Binary and SQLite
+            files are always loaded in full.
+        """
+        with open(filename, 'rb') as wf:
+            prefix = wf.read(16)
+            # Imported here, as SQLiteWorkouts subclasses Workouts
+            from crank.core import sqlite
+            if sqlite.is_sqlite(prefix):
+                return sqlite.SQLiteWorkouts.load(filename)
+            wf.seek(0)
+            if binary.is_binary(prefix):
+                with trace.stage('decode'):
+                    wkts = cls(fmt=cls.BINARY, **binary.load(wf))
+            else:
+                with trace.stage('read'):
+                    data = wf.read().decode()
+                with trace.stage('decode'):
+                    if lazy:
+                        json_obj = _loads_lazy(data)
+                        wkts = cls(filename=json_obj.get('filename'),
+                                   workouts=json_obj['workouts'])
+                    else:
+                        wkts = json.loads(data, cls=WorkoutsJSONDecoder)
         assert isinstance(wkts.workouts, Iterable)
+        wkts.journaled = journaled
+        with trace.stage('replay'):
+            wkts.replay(journal.journal_file(filename))
+        wkts._snapshot = filename
         return wkts
 
+    def replay(self, journal_file):
+        """Apply the records of a journal file to these Workouts."""
+        self._exercise_index = self._tag_index = None
+        for record in journal.read(journal_file):
+            if record['op'] == journal.PUT:
+                w = Workout.from_json(record['workout'])
+                self.workouts.discard(w)
+                self.workouts.add(w)
+            else:
+                self.workouts.discard(Workout(record['timestamp']))
+            self.journal_length += 1
+        if self.journal_length:
+            self.journaled = True
+
+    @classmethod
+    def parse_wkt_file(cls, filename, processes=1, cache=None):
+        """Parse a .wkt file.
+
+        If ``processes`` is anything but 1, the file is split into byte ranges
+        on block boundaries and the ranges are parsed in a process pool;
+        ``None`` uses one process per CPU.
+
+        ``cache`` names a :class:`ParseCache` file. Blocks unchanged since
+        the last parse are loaded from it instead of being re-parsed, and it
+        is rewritten afterwards. A cached parse always runs serially.
+        """
+        if cache is not None:
+            parse_cache = ParseCache.load(cache)
+            ws = cls()
+            ws.workouts.update(cls.iter_wkt_file(filename, parse_cache))
+            parse_cache.save()
+            return ws
+        if processes == 1:
+            return cls.parse_wkt(stream.stream_file(filename))
+        ws = cls()
+        # Several ranges per process keeps the pool busy when blocks vary
+        workers = processes or os.cpu_count()
+        ranges = stream.block_ranges(filename, workers * 4)
+        args = ((filename, start, end) for start, end in ranges)
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for wkts in executor.map(_parse_wkt_range, args):
+                ws.workouts.update(wkts)
+        return ws
+
     @classmethod
-    def parse_wkt_file(cls, filename):
-        """Parse a .wkt file."""
-        return cls.parse_wkt(stream.stream_file(filename))
+    def parse_wkt_dir(cls, directory, processes=None, pattern='*.wkt'):
+        """Parse every .wkt file in a directory into one Workouts.
+
+        Files are parsed concurrently; see
+        :func:`crank.core.ingest.parse_wkt_dir`. To keep the Workouts
+        current as files change, use
+        :class:`crank.core.ingest.DirectoryWatcher`.
+        """
+        # Imported here, as ingest builds on Workouts
+        from crank.core.ingest import parse_wkt_dir
+        return parse_wkt_dir(directory, processes, pattern, cls())
 
     @classmethod
     def parse_wkt(cls, wkts):
-        """Parse Workouts from a .wkt-formatted string or list of strings."""
+        """Parse Workouts from a .wkt-formatted string or list of strings.
+
+        Blocks sharing a timestamp collapse into one; to find out whether
+        they differ, :meth:`merge` :meth:`iter_wkt` instead.
+        """
+        ws = cls()
+        ws.workouts.update(cls.iter_wkt(wkts))
+        return ws
+
+    @classmethod
+    def iter_wkt_file(cls, filename, cache=None):
+        """Yield each Workout in a .wkt file as it is parsed.
+
+        Only one block of the file is held in memory at a time, so this is
+        safe to use over logs too large to collect into :class:`Workouts`.
+        """
+        return cls.iter_wkt(stream.stream_file(filename), cache=cache)
+
+    @staticmethod
+    def iter_wkt(wkts, cache=None):
+        """Yield Workouts from a .wkt-formatted string or iterable of lines.
+
+        Blocks are parsed through ``cache``, a :class:`ParseCache`, if given.
+        """
         if isinstance(wkts, str):
             wkts = wkts.split('\n')
         assert isinstance(wkts, Iterable)
         if not wkts:
             raise ValueError("Empty value provided")
-        ws = cls()
 
+        parse = Workout.parse_wkt if cache is None else cache.parse
         for wkt_block in stream.buffer_data(wkts):
-            ws.workouts.add(Workout.parse_wkt(wkt_block))
-        return ws
+            yield parse(wkt_block)
 
     def __repr__(self):
         json_str = json.dumps(self.to_json(), indent=2)
         return "Workouts(**{})".format(json_str)
 
 
+def _sortedset(iterable=()):
+    """Build a ``blist.sortedset``, importing blist on first use."""
+    from blist import sortedset
+    return sortedset(iterable)
+
+
+def _parse_wkt_range(args):
+    """Parse the Workouts in a byte range of a .wkt file."""
+    filename, start, end = args
+    return list(Workouts.iter_wkt(stream.stream_range(filename, start, end)))
+
+
+def _loads_lazy(s):
+    """Decode a Workouts JSON document into :class:`LazyWorkout` s.
+
+    The top-level object is scanned here, so each Workout keeps its own
+    slice of ``s`` as raw JSON rather than the decoded objects. Each Workout
+    is still decoded once, to read its timestamp and tags.
+    """
+    from json.decoder import WHITESPACE, JSONDecodeError
+    decode = json.JSONDecoder().raw_decode
+
+    def skip(pos, expect=None):
+        pos = WHITESPACE.match(s, pos).end()
+        if expect is not None:
+            if s[pos:pos + 1] != expect:
+                raise JSONDecodeError('Expecting ' + repr(expect), s, pos)
+            pos = WHITESPACE.match(s, pos + 1).end()
+        return pos
+
+    def items(pos, close, item):
+        """Scan the elements of an array or object with ``item``, which
+        returns the position after the element."""
+        if s[pos:pos + 1] != close:
+            pos = skip(item(pos))
+            while s[pos:pos + 1] == ',':
+                pos = skip(item(skip(pos, ',')))
+        return skip(pos, close)
+
+    json_obj = {'workouts': []}
+
+    def workout(pos):
+        d, end = decode(s, pos)
+        json_obj['workouts'].append(LazyWorkout(d, s[pos:end]))
+        return end
+
+    def member(pos):
+        key, pos = decode(s, pos)
+        pos = skip(pos, ':')
+        if key == 'workouts':
+            return items(skip(pos, '['), ']', workout)
+        json_obj[key], pos = decode(s, pos)
+        return pos
+
+    end = items(skip(0, '{'), '}', member)
+    if end != len(s):
+        raise JSONDecodeError('Extra data', s, end)
+    return json_obj
+
+
 class WorkoutsJSONEncoder(json.JSONEncoder):
 
     def default(self, o):
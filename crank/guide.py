@@ -1,20 +1,22 @@
 import re
 
-from colorama import Fore, Style
-
 from crank.util.cli import read_until_valid, confirm_input
-from crank.core.set import (fix_set_string, partition_set_tokens,
-                            process_set_partitions)
+from crank.core.set_v1 import (fix_set_string, partition_set_tokens,
+                               process_set_partitions)
 
 
 def fix_workouts(wkts):
     """Iterate through Workouts and fix problems.
 
     Problem of the Day: Unparseable Set strings!
+
+    Fixed Workouts are marked as touched, so journaled Workouts only save
+    what changed.
     """
     try:
         for w, ex, raw in raw_sets(wkts):
             guided_mediation(w, ex, raw)
+            wkts.touch(w)
     finally:
         wkts.save()
 
@@ -69,6 +71,8 @@ def step_through_set_string(s):
     Returns a list of [(work, reps)] tuples. Each tuple should be an
     unambiguous representation of one or more Sets.
     """
+    from colorama import Fore, Style
+
     parts = []
     chunk_re = r'(x|[^x,\s]+)'
     last = ''  # Last value was Work or Rep(s)
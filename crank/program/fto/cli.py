@@ -4,8 +4,6 @@ cli.py
 ===
 User-facing command-line functions for :module:`fto.logic`.
 """
-from argparse import ArgumentParser
-
 from crank.program.fto.logic import print_exercise, MassUnit
 from crank.util.cli import read_until_valid
 
@@ -26,6 +24,7 @@ def process_input():
 
 
 def parse_args():
+    from argparse import ArgumentParser
     parser = ArgumentParser()
     parser.add_argument('-n', '--name')
     parser.add_argument('-u', '--units', default='kg')
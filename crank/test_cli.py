@@ -0,0 +1,38 @@
+import io
+import os
+
+from crank import cli
+from crank.core.workouts import Workouts
+
+TEST_WKT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'core', 'tests', 'fixtures', 'squat.wkt')
+
+
+def test_profile_parse():
+    out = io.StringIO()
+    cli.profile_file(TEST_WKT_FILE, top=3, out=out)
+    report = out.getvalue()
+    assert report.startswith('parse ' + TEST_WKT_FILE + ': 43 workouts')
+    for stage in ('timestamp', 'tags', 'exercise_name', 'sets', 'sets_v1',
+                  'construct'):
+        assert '\n' + stage + ' ' in report
+    assert 'memory: peak' in report
+    assert 'function calls' in report
+
+
+def test_profile_load(tmpdir):
+    wkts = Workouts.parse_wkt_file(TEST_WKT_FILE)
+    wkts.filename = str(tmpdir.join('workouts.json'))
+    wkts.save()
+    out = io.StringIO()
+    cli.profile_file(wkts.filename, top=3, out=out)
+    report = out.getvalue()
+    assert report.startswith('load ')
+    assert '\ndecode ' in report
+
+
+def test_parse_args():
+    args = cli.parse_args(['profile', 'log.wkt', '--mode', 'load'])
+    assert (args.command, args.filename, args.mode) == \
+        ('profile', 'log.wkt', 'load')
+    assert args.top == 15
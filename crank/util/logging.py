@@ -15,3 +15,22 @@ logger = _logger
 
 def set_stdout_level(log_level):
     _stdout_handler.setLevel(log_level)
+    # stdout is our only handler, so there's no use creating records it
+    # would drop; this makes filtered-out logging calls nearly free
+    _logger.setLevel(log_level)
+
+
+class Pretty:
+    """Log argument that's pretty-printed only if the record is emitted.
+
+    ``logger.debug('%s', Pretty(obj))`` skips the ``pformat`` entirely
+    when debug output is filtered out.
+    """
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        from pprint import pformat
+        return pformat(self.obj)
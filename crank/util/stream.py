@@ -1,7 +1,12 @@
+import io
+import os
 import re
 
 from crank.util.logging import logger
 
+BLANK_LINES = (b'\n', b'\r\n')
+BLOCK_END_RE = re.compile(rb'\n\r?\n')
+
 
 def stream_str_blocks(s):
     """Group a string into a stream of lists by newline."""
@@ -15,6 +20,55 @@ def stream_file(filename):
             yield line
 
 
+def stream_range(filename, start, end):
+    """Stream the lines of a file between two byte offsets."""
+    with open(filename, 'rb') as fp:
+        fp.seek(start)
+        data = fp.read(end - start)
+    yield from io.StringIO(data.decode(), newline=None)
+
+
+def block_ranges(filename, n):
+    """Split a file into at most ``n`` byte ranges on blank-line boundaries.
+
+    Every range ends just after a blank line (or at EOF), so each holds only
+    whole blocks as grouped by :func:`buffer_data`.
+    """
+    size = os.path.getsize(filename)
+    bounds = [0]
+    with open(filename, 'rb') as fp:
+        for i in range(1, n):
+            target = max(size * i // n, bounds[-1])
+            if target >= size:
+                break
+            fp.seek(target)
+            fp.readline()  # Skip to the start of the next line
+            for line in iter(fp.readline, b''):
+                if line in BLANK_LINES:
+                    break
+            bounds.append(fp.tell())
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def mmap_blocks(mm):
+    """Yield the ``(start, end)`` byte offsets of each block in a buffer.
+
+    Blocks match those grouped by :func:`buffer_data`; the buffer (typically
+    an ``mmap``) is searched for blank lines without being decoded.
+    """
+    size = len(mm)
+    pos = 0
+    while pos < size:
+        if mm[pos:pos+1] == b'\n' or mm[pos:pos+2] == b'\r\n':
+            pos = mm.find(b'\n', pos) + 1  # Skip the blank line
+            continue
+        m = BLOCK_END_RE.search(mm, pos)
+        end = m.start() + 1 if m else size
+        yield pos, end
+        pos = end
+
+
 def buffer_data(source, delim='\n'):
     """Group data into a stream of lists."""
     bfr = []
@@ -1,3 +1,5 @@
+import io
+
 from crank.util import stream
 
 
@@ -11,3 +13,29 @@ def test_split_iter():
     )
     for test_in, test_out in io:
         assert test_out == list(stream.split_iter(test_in))
+
+
+def test_block_ranges(tmpdir):
+    wkt = tmpdir.join('blocks.wkt')
+    blocks = ['2016 Apr 1{} @ 1200\nSquat: 100 x 5\n'.format(i)
+              for i in range(10)]
+    wkt.write('\n'.join(blocks))
+    filename = str(wkt)
+    for n in (1, 3, 20):
+        ranges = stream.block_ranges(filename, n)
+        assert ranges[0][0] == 0
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        parsed = [b for start, end in ranges for b in
+                  stream.buffer_data(stream.stream_range(filename, start,
+                                                         end))]
+        assert parsed == list(stream.buffer_data(stream.stream_file(
+            filename)))
+
+
+def test_mmap_blocks():
+    data = b'\n2016 Apr 12\nSquat: 5\n\n\r\n  \nA: 1\n\nB: 2'
+    blocks = [data[a:b] for a, b in stream.mmap_blocks(data)]
+    assert blocks == [b'2016 Apr 12\nSquat: 5\n', b'  \nA: 1\n', b'B: 2']
+    # Same grouping as buffer_data over the decoded lines
+    lines = io.StringIO(data.decode(), newline=None)
+    assert len(blocks) == len(list(stream.buffer_data(lines)))
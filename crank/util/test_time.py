@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+
+from crank.util import time
+
+
+def test_parse_timestamp():
+    cases = (
+        ('2015 Oct 19 @ 1800', datetime(2015, 10, 19, 18, 0)),
+        ('2015 oct 5 @ 0800', datetime(2015, 10, 5, 8, 0)),
+        ('05 Oct 2015 @ 1153', datetime(2015, 10, 5, 11, 53)),
+        ('5 October 2015 @ 1153', datetime(2015, 10, 5, 11, 53)),
+        ('05Oct2015@1153', datetime(2015, 10, 5, 11, 53)),
+        ('2015-10-19T18:00:00', datetime(2015, 10, 19, 18, 0)),
+    )
+    for line, exp in cases:
+        assert time.parse_timestamp(line) == exp
+    with pytest.raises(ValueError):
+        time.parse_timestamp('2015 Feb 30 @ 1800')
+
+
+def test_parse_timestamp_fast_path():
+    line = '2016 Apr 12 @ 1536'
+    assert time.DATETIME_RE.match(line)
+    assert time.parse_timestamp.__wrapped__(line) == \
+        datetime.strptime(line, time.DATETIME_FORMAT)
+
+
+def test_parse_timestamp_adapts(monkeypatch):
+    # Reorder a copy, and parse afresh, so other tests see neither
+    monkeypatch.setattr(time, 'TIMESTAMP_FORMATS',
+                        list(time.TIMESTAMP_FORMATS))
+    time.parse_timestamp.cache_clear()
+    try:
+        time.parse_timestamp('12 April 2016 @ 1536')
+        assert time.TIMESTAMP_FORMATS[0] == '%d %B %Y @ %H%M'
+        assert time.parse_timestamp('12 April 2016 @ 1536') is \
+            time.parse_timestamp('12 April 2016 @ 1536')
+    finally:
+        time.parse_timestamp.cache_clear()
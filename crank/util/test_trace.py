@@ -0,0 +1,48 @@
+import logging
+
+from crank.core.workout import Workout
+from crank.util import trace
+from crank.util.logging import Pretty, logger, set_stdout_level
+
+WKT = '''2016 Apr 12 @ 1536
+- week: 2
+Curl, ring: 10/5
+Squat:
+- unit: kgs
+1) 100 x 5'''
+
+
+def test_disabled_by_default():
+    assert not trace.get_tracer().enabled
+    assert trace.stage('a') is trace.stage('b')
+
+
+def test_tracing():
+    with trace.tracing() as tracer:
+        Workout.parse_wkt(WKT)
+        Workout.parse_wkt(WKT)
+    assert not trace.get_tracer().enabled
+    assert tracer.calls['timestamp'] == 2
+    assert tracer.calls['exercise_name'] == 4
+    assert tracer.calls['sets'] == 4  # Every exercise tries v2 first
+    assert tracer.calls['sets_v1'] == 2
+    assert tracer.calls['tags'] == 6
+    assert all(s >= 0 for s in tracer.seconds.values())
+    assert set(tracer.to_json()) == set(tracer.calls)
+    assert tracer.report().splitlines()[0].split()[0] == 'stage'
+
+    Workout.parse_wkt(WKT)
+    assert tracer.calls['timestamp'] == 2
+
+
+def test_pretty_is_lazy():
+    class Loud:
+        def __repr__(self):
+            raise AssertionError('Formatted a filtered record')
+
+    set_stdout_level(logging.ERROR)
+    try:
+        logger.debug('%s', Pretty(Loud()))
+    finally:
+        set_stdout_level(logging.DEBUG)
+    assert str(Pretty({'a': 1})) == "{'a': 1}"
@@ -1,37 +1,68 @@
+import calendar
+import re
 from datetime import datetime
-
-import dateutil.parser
+from functools import lru_cache
 
 from crank.util.logging import logger
 
 
 DATETIME_FORMAT = '%Y %b %d @ %H%M'
+# Pre-compiled equivalent of DATETIME_FORMAT, e.g. '2016 Apr 12 @ 1536'
+DATETIME_RE = re.compile(r'(\d{4}) ([A-Za-z]{3}) (\d{1,2}) @ (\d\d)(\d\d)$')
+# Naive datetime.isoformat(), as written by Workout.to_json
+ISO_RE = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)$')
+MONTHS = {abbr.lower(): i for i, abbr in enumerate(calendar.month_abbr)
+          if abbr}
+# Fallback formats, re-ordered so the most recent success is tried first
+TIMESTAMP_FORMATS = [
+    '%Y %b %d @ %H%M',
+    '%d %b %Y @ %H%M',
+    '%d %B %Y @ %H%M',
+    '%d%b%Y@%H%M',
+    '%d%b%Y @ %H%M',
+]
 
 
 def get_timestamp_header():
     return datetime.now().strftime(DATETIME_FORMAT)
 
 
+@lru_cache(maxsize=1024)
 def parse_timestamp(line):
-    ts_formats = (
-        '%Y %b %d @ %H%M',
-        '%d %b %Y @ %H%M',
-        '%d %B %Y @ %H%M',
-        '%d%b%Y@%H%M',
-        '%d%b%Y @ %H%M',
-    )
-
-    # Try ISO8601
-    try:
-        return dateutil.parser.parse(line)
-    except:
-        pass
+    """Parse a timestamp header.
+
+    Recently parsed headers are memoized; failures are not.
+    """
+    m = DATETIME_RE.match(line)
+    if m:
+        year, month, day, hour, minute = m.groups()
+        try:
+            return datetime(int(year), MONTHS[month.lower()], int(day),
+                            int(hour), int(minute))
+        except (KeyError, ValueError):
+            pass
+    m = ISO_RE.match(line)
+    if m:
+        try:
+            return datetime(*map(int, m.groups()))
+        except ValueError:
+            pass
+    # dateutil can't parse any of our formats, as they all contain an '@'
+    if '@' not in line:
+        import dateutil.parser
+        try:  # ISO8601
+            return dateutil.parser.parse(line)
+        except (ValueError, OverflowError):
+            pass
     exc = None
-    for fmt in ts_formats:
+    for i, fmt in enumerate(TIMESTAMP_FORMATS):
         try:
-            return datetime.strptime(line, fmt)
-        except Exception as e:
+            ts = datetime.strptime(line, fmt)
+        except ValueError as e:
             exc = e
-    else:
-        logger.warning("Failed to parse: %s", line)
-        raise exc
+            continue
+        if i:
+            TIMESTAMP_FORMATS.insert(0, TIMESTAMP_FORMATS.pop(i))
+        return ts
+    logger.warning("Failed to parse: %s", line)
+    raise exc
@@ -0,0 +1,121 @@
+"""
+trace.py
+===
+Per-stage call counters and timers for the parse path.
+
+Instrumented code wraps each stage in ``with trace.stage('name'):``. Tracing
+is off by default, and a disabled stage is a shared do-nothing context
+manager, so no clock is read and nothing is allocated. Switch it on at
+runtime with :func:`enable` or the :func:`tracing` context manager, or for a
+whole process by setting ``CRANK_TRACE=1``.
+"""
+import os
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class Tracer:
+    """Counts calls to, and total seconds spent in, named stages."""
+    enabled = True
+
+    def __init__(self):
+        self.calls = Counter()
+        self.seconds = Counter()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def reset(self):
+        self.calls.clear()
+        self.seconds.clear()
+
+    def to_json(self):
+        return {name: {'calls': self.calls[name],
+                       'seconds': self.seconds[name]}
+                for name in self.calls}
+
+    def report(self):
+        """Format stages as a table, slowest first."""
+        lines = ['{:16} {:>10} {:>12} {:>10}'.format(
+            'stage', 'calls', 'total ms', 'us/call')]
+        for name, secs in self.seconds.most_common():
+            calls = self.calls[name]
+            lines.append('{:16} {:>10,d} {:>12.2f} {:>10.2f}'.format(
+                name, calls, secs * 1e3, secs * 1e6 / calls))
+        return '\n'.join(lines)
+
+
+class NullTracer:
+    """Stand-in Tracer for when tracing is off."""
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+
+class _Stage:
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.tracer.seconds[self.name] += perf_counter() - self.start
+        self.tracer.calls[self.name] += 1
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+_NULL_TRACER = NullTracer()
+_tracer = _NULL_TRACER
+
+
+def stage(name):
+    """Context manager timing a stage of the current Tracer."""
+    return _tracer.stage(name)
+
+
+def get_tracer():
+    return _tracer
+
+
+def enable(tracer=None):
+    """Start tracing into ``tracer``, or a new :class:`Tracer`."""
+    global _tracer
+    _tracer = tracer or Tracer()
+    return _tracer
+
+
+def disable():
+    """Stop tracing, returning the Tracer that was in use."""
+    global _tracer
+    tracer, _tracer = _tracer, _NULL_TRACER
+    return tracer
+
+
+@contextmanager
+def tracing(tracer=None):
+    """Trace the body of a ``with`` block, yielding the Tracer."""
+    previous = _tracer
+    try:
+        yield enable(tracer)
+    finally:
+        enable(previous)
+
+
+if os.environ.get('CRANK_TRACE'):
+    enable()
@@ -48,7 +48,8 @@ setup(
     packages=find_packages(),
     entry_points={
         'console_scripts': [
-            'fto=crank.program.fto.cli:process_input'
+            'fto=crank.program.fto.cli:process_input',
+            'crank=crank.cli:main'
         ]
     },
     tests_require=tests_require,